@@ -0,0 +1,149 @@
+"""
+Adaptive Testing - La Forge à Data Position
+Early section termination and item selection from per-question difficulty statistics
+"""
+
+import threading
+import time
+from typing import NamedTuple
+
+import pandas as pd
+
+from response_sync import get_response_sync
+from scoring import MAX_SCORE_PER_QUESTION, PASS_THRESHOLD
+
+# =============================================================================
+# DEFAULTS
+# =============================================================================
+MIN_RESPONSES = 5      # Answers needed before a question's statistics are used
+STATS_TTL = 300        # Seconds between two refreshes of the item statistics
+
+
+class ItemStats(NamedTuple):
+    """Observed score of a question, as a fraction of the maximum score."""
+    difficulty: float  # Mean score: low = hard
+    variance: float
+    count: int
+
+
+# =============================================================================
+# EARLY TERMINATION
+# =============================================================================
+def _score_range(question):
+    scores = [s or 0 for s in question.scores] or [0]
+    return min(scores), max(scores)
+
+
+def section_bounds(questions, answered):
+    """Lowest and highest section score still reachable, as fractions.
+
+    ``answered`` maps question text to the score obtained. Unanswered
+    questions count with their lowest and highest answer scores; the
+    denominator is the one ``section_score`` uses.
+    """
+    if not questions:
+        return 1.0, 1.0
+    got = sum(answered[q.text] or 0 for q in questions if q.text in answered)
+    remaining = [_score_range(q) for q in questions if q.text not in answered]
+    maximum = len(questions) * MAX_SCORE_PER_QUESTION
+    return ((got + sum(low for low, _ in remaining)) / maximum,
+            (got + sum(high for _, high in remaining)) / maximum)
+
+
+def section_outcome(questions, answered, threshold=PASS_THRESHOLD):
+    """True once the section is passed whatever the remaining answers, False once
+    it can no longer be passed, None while the remaining answers can change it."""
+    lower, upper = section_bounds(questions, answered)
+    if lower >= threshold:
+        return True
+    if upper < threshold:
+        return False
+    return None
+
+
+def section_estimate(questions, answered):
+    """Score of a section stopped early: the rate on the questions answered,
+    extended to the others and kept within the reachable bounds so that it
+    agrees with the decided outcome."""
+    lower, upper = section_bounds(questions, answered)
+    asked = [q for q in questions if q.text in answered]
+    if not asked:
+        return lower
+    got = sum(answered[q.text] or 0 for q in asked)
+    rate = got / (sum(_score_range(q)[1] for q in asked) or 1)
+    rest = sum(_score_range(q)[1] for q in questions if q.text not in answered)
+    estimate = (got + rate * rest) / (len(questions) * MAX_SCORE_PER_QUESTION)
+    return min(upper, max(lower, estimate))
+
+
+# =============================================================================
+# ITEM SELECTION
+# =============================================================================
+def item_statistics(responses, min_responses=MIN_RESPONSES):
+    """Per ``(profile, question)`` difficulty and variance from Form3 answers."""
+    if responses.empty or not {'profile_type', 'question', 'score'} <= set(responses.columns):
+        return {}
+    scores = pd.to_numeric(responses['score'], errors='coerce') / MAX_SCORE_PER_QUESTION
+    grouped = (scores.groupby([responses['profile_type'].astype(str), responses['question'].astype(str)])
+               .agg(['mean', 'var', 'count']))
+    grouped = grouped[grouped['count'] >= min_responses].fillna(0.0)
+    return {key: ItemStats(float(row.mean), float(row.var), int(row.count))
+            for key, row in zip(grouped.index, grouped.itertuples(index=False))}
+
+
+def next_question(questions, answered, profile, statistics=None):
+    """Next question to ask: the most informative one left, else display order.
+
+    A question whose scores vary most across past respondents is the one
+    whose answer moves the section total the most, so it settles the
+    outcome soonest. Questions without enough history get the mean
+    variance of the others and keep their display order among ties.
+    """
+    remaining = [q for q in questions if q.text not in answered]
+    if not remaining or not statistics:
+        return remaining[0] if remaining else None
+    known = [statistics[(profile, q.text)].variance for q in remaining if (profile, q.text) in statistics]
+    if not known:
+        return remaining[0]
+    prior = sum(known) / len(known)
+    return max(remaining, key=lambda q: statistics.get((profile, q.text), ItemStats(0.0, prior, 0)).variance)
+
+
+_lock = threading.Lock()
+_statistics = {}  # table_id -> (refreshed at, snapshot version, statistics)
+_refreshing = set()
+
+
+def get_item_statistics(table_id, ttl=STATS_TTL):
+    """Process-wide item statistics of a responses table, refreshed every ``ttl`` seconds.
+
+    Never waits on the backend: a missing or expired entry is rebuilt by a
+    background thread while respondents keep the previous values (none at
+    first, so questions are asked in display order until it is loaded).
+    """
+    with _lock:
+        refreshed_at, version, statistics = _statistics.get(table_id, (None, None, {}))
+        expired = refreshed_at is None or time.monotonic() - refreshed_at >= ttl
+        if not expired or table_id in _refreshing:
+            return statistics
+        _refreshing.add(table_id)
+    sync = get_response_sync(table_id)  # Resolved here: cache_resource needs the script thread
+    threading.Thread(target=_refresh_statistics, args=(table_id, sync, version),
+                     name=f"item-statistics-{table_id}", daemon=True).start()
+    return statistics
+
+
+def _refresh_statistics(table_id, sync, version):
+    statistics = None
+    try:
+        store, error = sync.refresh()
+        if not error and store.version != version:
+            version, statistics = store.version, item_statistics(
+                store.query(columns=['profile_type', 'question', 'score']))
+    except Exception:
+        pass  # Retried at the next expiry; meanwhile the previous statistics stay in use
+    with _lock:
+        _refreshing.discard(table_id)
+        if statistics is None:
+            statistics = _statistics.get(table_id, (None, None, {}))[2]
+        _statistics[table_id] = (time.monotonic(), version, statistics)
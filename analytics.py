@@ -0,0 +1,129 @@
+"""
+Analytics - La Forge à Data Position
+Vectorized aggregations behind the Admin Position tab
+"""
+
+import numpy as np
+import pandas as pd
+
+MAX_RADAR_SERIES = 12  # Upper bound on the series sent to the radar, whatever the population
+RADAR_MODES = {
+    'top': "Top N participants",
+    'mean': "Moyenne de l'équipe",
+    'percentiles': "Percentiles (p25 / p50 / p75)",
+    'subset': "Sélection de participants",
+    'archetypes': "Archétypes",
+}
+
+
+def series_radar(profiles, names, values):
+    """Radar ``DATA`` and keys for named series given as a series × profiles matrix.
+
+    NaN values (profile not evaluated) are left out of their profile's dict.
+    """
+    data = [
+        {"profile": profile,
+         **{name: round(float(v), 2) for name, v in zip(names, values[:, k]) if not np.isnan(v)}}
+        for k, profile in enumerate(profiles)
+    ]
+    return data, list(names)
+
+
+def reduce_radar(mode, labels, skills, evaluated, top_n=10, selected=()):
+    """Series names and series × profiles values for a radar reduction mode.
+
+    ``skills``/``evaluated`` are the participants × profiles matrices of a
+    SkillIndex; statistics only use evaluated profiles. ``top`` ranks
+    participants by their mean over evaluated profiles. At most
+    ``MAX_RADAR_SERIES`` series are returned, so the payload size only
+    depends on the number of profiles.
+    """
+    values = np.where(evaluated, skills, np.nan)
+    counts = evaluated.sum(axis=0)
+    if mode == 'mean':
+        totals = np.where(evaluated, skills, 0).sum(axis=0)
+        return ["Moyenne"], np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)[None, :]
+    if mode == 'percentiles':
+        bands = np.full((3, values.shape[1]), np.nan)
+        has_values = counts > 0
+        bands[:, has_values] = np.nanpercentile(values[:, has_values], [25, 50, 75], axis=0)
+        return ["p25", "p50", "p75"], bands
+
+    if mode == 'top':
+        evaluated_count = evaluated.sum(axis=1)
+        means = np.where(evaluated, skills, 0).sum(axis=1) / np.maximum(evaluated_count, 1)
+        means[evaluated_count == 0] = -np.inf
+        rows = np.argsort(-means, kind='stable')[:min(top_n, MAX_RADAR_SERIES)]
+    else:
+        rows = np.asarray(list(selected)[:MAX_RADAR_SERIES], dtype=int)
+    return [labels[i] for i in rows], values[rows]
+
+
+def participant_summary(form_data, weight=None):
+    """One row per participant: mean score and evaluated profiles.
+
+    Participants are encoded once; means come from ``np.bincount`` and the
+    profile lists from a bitmask per participant, so only the distinct
+    profile combinations (a handful) are joined into strings.
+    """
+    groups = form_data.groupby(['nom', 'prenom'], observed=True, sort=False)
+    # Rows with a missing name belong to no group: NaN code, mapped to -1 and skipped below
+    codes = groups.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    keys = groups.size().index
+    n = len(keys)
+
+    scores = pd.to_numeric(form_data['score'], errors='coerce').to_numpy(dtype=np.float64)
+    weights = (pd.to_numeric(form_data[weight], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+               if weight else np.ones(len(form_data)))
+    scored = (codes >= 0) & ~np.isnan(scores)
+    totals = np.bincount(codes[scored], weights=scores[scored] * weights[scored], minlength=n)
+    counts = np.bincount(codes[scored], weights=weights[scored], minlength=n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = np.where(counts > 0, totals / counts, np.nan)
+
+    profile_codes, profiles = pd.factorize(form_data['profile_type'])
+    evaluated = (codes >= 0) & (profile_codes >= 0)
+    masks = np.zeros(n, dtype=np.int64)
+    np.bitwise_or.at(masks, codes[evaluated], np.left_shift(1, profile_codes[evaluated]).astype(np.int64))
+    combinations, inverse = np.unique(masks, return_inverse=True)
+    labels = np.array([', '.join(str(p) for k, p in enumerate(profiles) if mask >> k & 1)
+                       for mask in combinations], dtype=object)
+
+    summary = pd.DataFrame({
+        'Nom': keys.get_level_values(0).astype(str),
+        'Prénom': keys.get_level_values(1).astype(str),
+        'Score moyen': means,
+        'Profils': labels[inverse],
+    })
+    return summary.sort_values(['Nom', 'Prénom'], ignore_index=True)
+
+
+def table_page(frame, page=1, page_size=50, sort_by=None, ascending=True, search=None):
+    """One page of ``frame`` after filtering and sorting. Returns ``(rows, matches, pages)``.
+
+    ``search`` keeps rows where any text column contains it (case-insensitive).
+    Sorting uses an argsort on a single column, and only the requested page
+    is copied out of ``frame``.
+    """
+    if search:
+        text_columns = [c for c in frame.columns if frame[c].dtype == object or pd.api.types.is_string_dtype(frame[c])]
+        match = np.zeros(len(frame), dtype=bool)
+        for column in text_columns:
+            match |= frame[column].str.contains(search, case=False, regex=False, na=False).to_numpy()
+        positions = np.flatnonzero(match)
+    else:
+        positions = np.arange(len(frame))
+
+    if sort_by in frame.columns and len(positions):
+        column = frame[sort_by].iloc[positions]
+        if pd.api.types.is_numeric_dtype(column):
+            order = np.argsort(column.to_numpy(), kind='stable')
+        else:
+            order = column.reset_index(drop=True).sort_values(kind='stable').index.to_numpy()
+        if not ascending:
+            order = order[::-1]
+        positions = positions[order]
+
+    pages = max(1, -(-len(positions) // page_size))
+    page = min(max(1, page), pages)
+    return frame.iloc[positions[(page - 1) * page_size:page * page_size]], len(positions), pages
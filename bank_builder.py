@@ -0,0 +1,383 @@
+"""
+Question Bank Builder - La Forge à Data Position
+Stream the core_data exports into one normalized, deduplicated and versioned question bank
+
+Usage:
+    python bank_builder.py core_data/                 # build bank/, reparsing only the exports that changed
+    python bank_builder.py core_data/ --out bank/ --force
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+import pyarrow as pa
+
+from question_bank import FORM2_COLUMNS, SECTION_ORDER, to_number
+
+# =============================================================================
+# DEFAULTS
+# =============================================================================
+DEFAULT_BANK_DIR = "bank"
+CSV_PATTERN = "Questionnaire_atelier.xlsx - *.csv"
+SCHEMA_VERSION = 2           # Bump when normalization changes: every cached export is reparsed
+SOURCE_ALIASES = {"dpo": "data protection officer"}  # Exports not named after their profile
+ROW_KEY = ("profile_type", "question_type", "question", "reponse")  # One answer of the bank
+HASH_CHUNK = 1 << 16
+
+BANK_SCHEMA = pa.schema([
+    ("profile_type", pa.string()),
+    ("question_type", pa.string()),
+    ("position", pa.int64()),
+    ("question", pa.string()),
+    ("reponse", pa.string()),
+    ("score", pa.float64()),
+    ("row_hash", pa.string()),
+])
+
+
+def iter_csv_files(paths):
+    """Expand directories into the question bank exports they contain."""
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from sorted(path.glob(CSV_PATTERN))
+        else:
+            yield path
+
+
+# =============================================================================
+# NORMALIZATION
+# =============================================================================
+def _text(value):
+    """NFC text without surrounding whitespace (None when empty)."""
+    if value is None:
+        return None
+    value = unicodedata.normalize("NFC", value).strip()
+    return value or None
+
+
+def _fold(name):
+    """Accent- and case-insensitive form of a profile or export name."""
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+
+
+def _typed(value):
+    # "1,5" and "2.0" become 1.5 and 2; integral scores stay ints
+    value = to_number(value.replace(",", ".") if isinstance(value, str) else value)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return value
+
+
+def row_hash(fields):
+    """Content hash of a canonical row, identical across exports."""
+    payload = json.dumps([fields[c] for c in FORM2_COLUMNS], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def normalize_row(row):
+    """Map one export row, whatever its columns, to ``(canonical fields, error)``.
+
+    Missing columns become None, texts are NFC-normalized and stripped,
+    ``score`` and ``position`` are typed. Rows without a question return
+    ``(None, None)``; rows without a profile, a known section or a numeric
+    score are rejected, since the questionnaire would pass an empty
+    section at 100%.
+    """
+    fields = {col: _text(row.get(col)) for col in FORM2_COLUMNS}
+    if not fields["question"]:
+        return None, None
+    if not fields["profile_type"]:
+        return None, "profil manquant"
+    if not fields["question_type"]:
+        return None, "section manquante"
+    fields["question_type"] = fields["question_type"].lower()
+    if fields["question_type"] not in SECTION_ORDER:
+        return None, f"section inconnue « {fields['question_type']} »"
+    for col in ("score", "position"):
+        fields[col] = _typed(fields[col])
+        if isinstance(fields[col], str):
+            return None, f"{col} non numérique « {fields[col]} »"
+    if fields["score"] is None:
+        return None, "score manquant"
+    return fields, None
+
+
+def parse_export(path, problems):
+    """Yield the canonical rows of one export in file order.
+
+    Exports without a ``position`` column number questions by first
+    appearance within their section. Rejected rows are appended to
+    ``problems``.
+    """
+    path = Path(path)
+    positions = {}  # (profile, section) -> {question: position}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            fields, error = normalize_row(row)
+            if error:
+                problems.append(f"{path.name}:{reader.line_num} : {error}")
+            if fields is None:
+                continue
+            if fields["position"] is None:
+                questions = positions.setdefault((fields["profile_type"], fields["question_type"]), {})
+                fields["position"] = questions.setdefault(fields["question"], len(questions) + 1)
+            yield fields
+
+
+# =============================================================================
+# MERGE
+# =============================================================================
+def export_owners(names):
+    """Folded profile name -> export named after it (``... - DPO.csv`` owns Data Protection Officer)."""
+    owners = {}
+    for name in names:
+        label = _fold(Path(name).stem.rsplit(" - ", 1)[-1])
+        owners[SOURCE_ALIASES.get(label, label)] = name
+    return owners
+
+
+def merge_sources(sources, stats):
+    """Yield the bank rows from ``(export name, rows)`` pairs, in export order.
+
+    Every export repeats the global questionnaire, and a profile's own
+    export carries its corrections: a profile's rows are taken from its
+    own export when there is one, from every export otherwise. Each answer
+    (``ROW_KEY``) is kept once, the first in export and file order wins:
+    ``stats`` counts the overridden rows and the duplicates, and lists the
+    duplicates whose score differs from the kept one in ``conflicts``.
+    """
+    sources = list(sources)
+    owners = export_owners(name for name, _ in sources)
+    kept = {}  # ROW_KEY -> score
+    stats.setdefault("duplicates", 0)
+    stats.setdefault("overridden", 0)
+    stats.setdefault("conflicts", [])
+    for name, rows in sources:
+        for fields in rows:
+            owner = owners.get(_fold(fields["profile_type"]))
+            if owner is not None and owner != name:
+                stats["overridden"] += 1
+                continue
+            key = tuple(fields[col] for col in ROW_KEY)
+            if key in kept:
+                stats["duplicates"] += 1
+                if fields["score"] != kept[key]:
+                    stats["conflicts"].append(
+                        f"{name} : {fields['profile_type']} / {fields['question_type']} / « {fields['question']} » / "
+                        f"« {fields['reponse']} » : score {_typed(fields['score'])} ignoré, "
+                        f"{_typed(kept[key])} conservé")
+                continue
+            kept[key] = fields["score"]
+            yield {**{col: fields[col] for col in FORM2_COLUMNS},
+                   "row_hash": fields.get("row_hash") or row_hash(fields)}
+
+
+def check_profiles(rows):
+    """``(errors, empty)`` for merged bank rows.
+
+    ``errors`` lists rows that must never be emitted (no section, score
+    not a number); ``empty`` maps each profile to its sections without any
+    question, which the questionnaire passes at 100% without asking.
+    """
+    errors, sections = [], {}
+    for fields in rows:
+        if fields["question_type"] not in SECTION_ORDER or not isinstance(fields["score"], (int, float)):
+            errors.append(f"{fields['profile_type']} / « {fields['question']} » / « {fields['reponse']} »")
+        sections.setdefault(fields["profile_type"], set()).add(fields["question_type"])
+    empty = {profile: [s for s in SECTION_ORDER if s not in found]
+             for profile, found in sections.items() if not set(SECTION_ORDER) <= found}
+    return errors, empty
+
+
+def bank_rows(paths, stats=None, problems=None):
+    """Canonical Form2 rows straight from the exports, without the on-disk cache."""
+    stats = {} if stats is None else stats
+    problems = [] if problems is None else problems
+    files = list(iter_csv_files(paths))
+    for fields in merge_sources(((p.name, parse_export(p, problems)) for p in files), stats):
+        fields.pop("row_hash")
+        yield fields
+
+
+# =============================================================================
+# INCREMENTAL BUILD
+# =============================================================================
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_arrow(table, path):
+    tmp = path.with_name(path.name + ".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def _read_arrow(path):
+    return pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+
+
+def _rows_table(rows, metadata=None):
+    table = pa.Table.from_pylist(rows, schema=BANK_SCHEMA)
+    return table.replace_schema_metadata(metadata) if metadata else table
+
+
+def _read_manifest(directory):
+    try:
+        with open(directory / "manifest.json", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if manifest.get("schema") == SCHEMA_VERSION else {}
+
+
+def build_question_bank(paths, directory=DEFAULT_BANK_DIR, force=False):
+    """Build the versioned bank in ``directory`` from the exports. Returns ``(report, error)``.
+
+    Each export is normalized once into ``sources/<content hash>.arrow``,
+    with the rows it rejected;
+    an export whose size and mtime are unchanged is not even read again,
+    and one whose content is unchanged is not reparsed. The bank is then
+    merged from these cached rows and written as
+    ``question_bank-<version>.arrow``, the version being a hash of its
+    rows, so an unchanged bank is not rewritten. When no export changed at
+    all, nothing but the exports' sizes and mtimes is read.
+    """
+    directory = Path(directory)
+    cache = directory / "sources"
+    cache.mkdir(parents=True, exist_ok=True)
+    manifest = {} if force else _read_manifest(directory)
+    known = manifest.get("sources", {})
+
+    files = list(iter_csv_files(paths))
+    if not files:
+        return None, "Aucun export trouvé"
+    report = {"rebuilt": [], "reused": [], "problems": [], "conflicts": [], "incomplete": {},
+              "duplicates": 0, "overridden": 0}
+    sources = {}
+    try:
+        for path in files:
+            stat = path.stat()
+            entry = known.get(path.name)
+            if not (entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns):
+                entry = {"sha256": _file_sha256(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            segment = cache / f"{entry['sha256'][:16]}.arrow"
+            if segment.exists() and not force:
+                report["reused"].append(path.name)
+            else:
+                problems = []
+                rows = [{**fields, "row_hash": row_hash(fields)} for fields in parse_export(path, problems)]
+                _write_arrow(_rows_table(rows, {"problems": json.dumps(problems, ensure_ascii=False)}), segment)
+                report["rebuilt"].append(path.name)
+            entry["segment"] = segment.name
+            sources[path.name] = entry
+
+        if sources == known and (directory / manifest.get("bank", "")).is_file():
+            # Same exports with the same content: the current bank is up to date
+            report.update({key: manifest[key] for key in ("version", "rows", "duplicates", "overridden", "problems",
+                                                          "conflicts", "incomplete")})
+            report["changed"] = False
+            return report, None
+
+        segments = {name: _read_arrow(cache / entry["segment"]) for name, entry in sources.items()}
+        for table in segments.values():
+            report["problems"].extend(json.loads((table.schema.metadata or {}).get(b"problems", b"[]")))
+        rows = list(merge_sources(((name, table.to_pylist()) for name, table in segments.items()), report))
+        errors, report["incomplete"] = check_profiles(rows)
+        if errors:
+            return None, f"{len(errors)} ligne(s) sans section ou sans score numérique : {errors[0]}"
+        version = hashlib.sha256("".join(r["row_hash"] for r in rows).encode()).hexdigest()[:12]
+        bank = directory / f"question_bank-{version}.arrow"
+        report.update({"version": version, "rows": len(rows), "changed": not bank.exists()})
+        if report["changed"]:
+            _write_arrow(_rows_table(rows, {"version": version}), bank)
+
+        new_manifest = {"schema": SCHEMA_VERSION, "version": version, "bank": bank.name, "rows": len(rows),
+                        "duplicates": report["duplicates"], "overridden": report["overridden"],
+                        "problems": report["problems"], "conflicts": report["conflicts"],
+                        "incomplete": report["incomplete"], "built_at": time.time(), "sources": sources}
+        tmp = directory / "manifest.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(new_manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, directory / "manifest.json")
+    except (OSError, pa.ArrowException) as e:
+        return None, str(e)
+
+    # Drop cached exports and bank versions that are no longer referenced
+    referenced = {entry["segment"] for entry in sources.values()}
+    for segment in cache.glob("*.arrow"):
+        if segment.name not in referenced:
+            segment.unlink(missing_ok=True)
+    for old in directory.glob("question_bank-*.arrow"):
+        if old.name != bank.name:
+            old.unlink(missing_ok=True)
+    return report, None
+
+
+def read_question_bank(directory=DEFAULT_BANK_DIR):
+    """The built bank as a Form2 payload (``records`` plus ``version``). Returns ``(payload, error)``."""
+    directory = Path(directory)
+    manifest = _read_manifest(directory)
+    if not manifest:
+        return None, f"Banque de questions introuvable dans {directory} (lancez bank_builder.py)"
+    try:
+        columns = _read_arrow(directory / manifest["bank"]).select(list(FORM2_COLUMNS)).to_pydict()
+    except (OSError, pa.ArrowException) as e:
+        return None, str(e)
+    columns["score"] = [_typed(s) for s in columns["score"]]
+    records = [{"id": i, "fields": dict(zip(FORM2_COLUMNS, values))}
+               for i, values in enumerate(zip(*(columns[c] for c in FORM2_COLUMNS)), start=1)]
+    return {"records": records, "version": manifest["version"]}, None
+
+
+def is_question_bank(path):
+    """True for a directory holding a built bank."""
+    return (Path(path) / "manifest.json").is_file()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Construit la banque de questions versionnée depuis core_data.")
+    parser.add_argument("paths", nargs="+", help="Fichiers CSV ou dossiers (ex. core_data/)")
+    parser.add_argument("--out", default=DEFAULT_BANK_DIR, help="Dossier de la banque construite")
+    parser.add_argument("--force", action="store_true", help="Réanalyse tous les exports")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    report, error = build_question_bank(args.paths, args.out, args.force)
+    if error:
+        print(f"Échec : {error}", file=sys.stderr)
+        return 1
+    print(f"Exports réanalysés : {len(report['rebuilt'])}, réutilisés : {len(report['reused'])}")
+    for name in report["rebuilt"]:
+        print(f"  ~ {name}")
+    print(f"{report['rows']} ligne(s), {report['duplicates']} doublon(s) écarté(s), "
+          f"{report['overridden']} ligne(s) remplacée(s) par l'export du profil")
+    for problem in report["problems"]:
+        print(f"  ! {problem}")
+    if report["conflicts"]:
+        print(f"{len(report['conflicts'])} réponse(s) en double avec un autre score (la première est gardée) :")
+        for conflict in report["conflicts"]:
+            print(f"  ! {conflict}")
+    for profile, sections in report["incomplete"].items():
+        print(f"  ! {profile} : aucune question en {', '.join(sections)} (section validée d'office)")
+    status = "nouvelle version" if report["changed"] else "inchangée"
+    print(f"Version {report['version']} ({status}) en {time.perf_counter() - start:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Question Bank Build Benchmark - La Forge à Data Position
+Parsing every core_data export vs loading the built bank, and cold vs incremental rebuilds
+
+Usage: python benchmarks/bench_question_bank_build.py [--repeat 20]
+"""
+
+import argparse
+import csv
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bank_builder import CSV_PATTERN, build_question_bank, read_question_bank
+from question_bank import compile_question_bank, form2_fields
+
+CORE_DATA = ROOT / "core_data"
+
+
+def parse_exports(directory):
+    """What loading the bank from CSV cost before: every export, every row."""
+    records = []
+    for path in sorted(directory.glob(CSV_PATTERN)):
+        with open(path, newline="", encoding="utf-8") as f:
+            records.extend({"id": len(records) + i, "fields": form2_fields(row)}
+                           for i, row in enumerate(csv.DictReader(f), start=1))
+    return records
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return 1000 * min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        exports = Path(tmp) / "core_data"
+        shutil.copytree(CORE_DATA, exports)
+        bank_dir = Path(tmp) / "bank"
+
+        def cold():
+            shutil.rmtree(bank_dir, ignore_errors=True)
+            build_question_bank([exports], bank_dir)
+
+        cold_ms = best_of(args.repeat, cold)
+        noop_ms = best_of(args.repeat, lambda: build_question_bank([exports], bank_dir))
+
+        # One export edited: only that file is reparsed, the others come from the cache
+        edited = exports / "Questionnaire_atelier.xlsx - Data hunter.csv"
+
+        def one_changed():
+            with open(edited, "a", encoding="utf-8") as f:
+                f.write("\n")
+            build_question_bank([exports], bank_dir)
+
+        one_ms = best_of(args.repeat, one_changed)
+        report, error = build_question_bank([exports], bank_dir)
+        if error:
+            sys.exit(error)
+
+        csv_records = parse_exports(exports)
+        payload, _ = read_question_bank(bank_dir)
+        csv_ms = best_of(args.repeat, lambda: compile_question_bank(parse_exports(exports)))
+        bank_ms = best_of(args.repeat, lambda: compile_question_bank(read_question_bank(bank_dir)[0]["records"]))
+
+    print(f"Exports : {len(csv_records)} lignes -> banque {report['version']} : {len(payload['records'])} lignes "
+          f"({report['duplicates']} doublons, {report['overridden']} remplacées par l'export du profil)\n")
+    print(f"{'étape':<38} {'ms':>8}")
+    print(f"{'construction complète':<38} {cold_ms:>8.2f}")
+    print(f"{'reconstruction sans changement':<38} {noop_ms:>8.2f}")
+    print(f"{'reconstruction, un export modifié':<38} {one_ms:>8.2f}")
+    print(f"{'chargement + compilation depuis CSV':<38} {csv_ms:>8.2f}")
+    print(f"{'chargement + compilation (banque)':<38} {bank_ms:>8.2f}  (x{csv_ms / bank_ms:.1f})")
+
+
+if __name__ == "__main__":
+    main()
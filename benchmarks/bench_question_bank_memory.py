@@ -0,0 +1,86 @@
+"""
+Question Bank Memory Report - La Forge à Data Position
+Bytes held per concurrent session: per-session questions_df vs the shared QuestionBank
+
+Usage: python benchmarks/bench_question_bank_memory.py [--sessions 1 10 100]
+"""
+
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
+from types import MappingProxyType
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from question_bank import compile_question_bank, form2_fields, get_question_bank
+
+BANK_CSV = ROOT / "core_data" / "Questionnaire_atelier.xlsx - Questionnaire global.csv"
+
+
+def load_payload():
+    """Form2 as the Grist API returns it."""
+    with open(BANK_CSV, newline='', encoding='utf-8') as f:
+        return {"records": [
+            {"id": i, "fields": form2_fields(row)}
+            for i, row in enumerate(csv.DictReader(f), start=1)
+        ]}
+
+
+def deep_size(obj, seen):
+    """Bytes reachable from ``obj``, not counting objects already in ``seen``."""
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (dict, MappingProxyType)):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+
+def per_session_questions_df(payload):
+    """What every Questionnaire session used to build from its own Form2 fetch."""
+    own_payload = json.loads(json.dumps(payload))  # A separate API response per session
+    questions_df = pd.json_normalize(own_payload["records"], sep='_')
+    questions_df.columns = [col.replace('fields_', '') for col in questions_df.columns]
+    return own_payload, questions_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+
+    payload = load_payload()
+    bank = compile_question_bank(payload["records"])
+    n_questions = sum(len(q) for q in bank.sections.values())
+    print(f"Form2 : {len(payload['records'])} lignes, {n_questions} questions, {len(bank.profiles)} profils")
+    print(f"Banque compilée : {deep_size(bank, set()) / 1024:.1f} Ko (partagée)\n")
+
+    print(f"{'sessions':>9} {'avant Ko':>10} {'après Ko':>10} {'avant/session':>14} {'après/session':>14}")
+    for n in args.sessions:
+        # Before: each session fetched Form2 and normalized it into its own frame
+        sessions = [per_session_questions_df(payload) for _ in range(n)]  # Kept alive: ids stay unique
+        seen = set()
+        before = sum(deep_size(session, seen) for session in sessions)
+
+        # After: one cached payload and one compiled bank, sessions only hold references
+        seen = set()
+        after = deep_size(payload, seen) + deep_size(bank, seen)
+        sessions = [{'question_bank': get_question_bank(payload)} for _ in range(n)]
+        after += sum(deep_size(session, seen) for session in sessions)
+
+        print(f"{n:>9} {before / 1024:>10.1f} {after / 1024:>10.1f} "
+              f"{before / n / 1024:>14.1f} {after / n / 1024:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
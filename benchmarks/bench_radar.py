@@ -0,0 +1,109 @@
+"""
+Radar Aggregation Benchmark - La Forge à Data Position
+Compares the former per-name/per-profile mask loop with the Position tab's path:
+SkillIndex build (once per snapshot version), then reduce_radar + series_radar (every rerun)
+
+Usage: python benchmarks/bench_radar.py [--max-rows 100000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analytics import reduce_radar, series_radar
+from skill_search import SkillIndex
+from teams import skill_matrix
+
+PROFILES = ["Data Analyst", "Data Scientist", "Machine Learning Engineer",
+            "Geomaticien", "Data Engineer", "Data Protection Officer",
+            "Chef de Projet Data"]
+QUESTIONS_PER_PROFILE = 15
+LOOP_MAX_ROWS = 10_000  # The mask loop is quadratic, stop timing it past this size
+
+
+def make_responses(n_rows, seed=0):
+    """Synthetic Form3 frame: each participant answers every question of 2 profiles."""
+    rng = np.random.default_rng(seed)
+    participant = np.arange(n_rows) // (2 * QUESTIONS_PER_PROFILE)
+    profile_idx = (participant + np.arange(n_rows) // QUESTIONS_PER_PROFILE % 2) % len(PROFILES)
+    return pd.DataFrame({
+        'nom': pd.Series(participant).map(lambda i: f"nom_{i}"),
+        'prenom': pd.Series(participant).map(lambda i: f"prenom_{i}"),
+        'profile_type': np.array(PROFILES, dtype=object)[profile_idx],
+        'score': rng.integers(0, 5, size=n_rows),
+    })
+
+
+def mask_loop(form_data):
+    """The original radar construction from pages/1_Admin.py."""
+    unique_noms = [n for n in form_data['nom'].unique() if n]
+    DATA = []
+    for profile_type in form_data['profile_type'].unique():
+        if not profile_type:
+            continue
+        profile_data = {"profile": profile_type}
+        for nom in unique_noms:
+            filtered = form_data[(form_data['nom'] == nom) & (form_data['profile_type'] == profile_type)]
+            if not filtered.empty:
+                profile_data[nom] = filtered['score'].mean()
+        DATA.append(profile_data)
+    return DATA, unique_noms
+
+
+def build_index(form_data):
+    """What get_skill_index does when the snapshot changed."""
+    return SkillIndex(*skill_matrix(form_data, fill_value=np.nan))
+
+
+def radar(index, mode='top'):
+    """What the Position tab does on every rerun."""
+    names, values = reduce_radar(mode, index.labels, index.skills, index.evaluated)
+    return series_radar(index.profiles, names, values)
+
+
+def timed(fn, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def check(index, data, expected):
+    """Radar series must hold the same means as the loop's, for the same participants."""
+    by_profile = {d["profile"]: d for d in expected}
+    for entry in data:
+        for label, value in entry.items():
+            if label != "profile":
+                nom = label.split(' ')[1]
+                assert round(value, 2) == round(float(by_profile[entry["profile"]][nom]), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--max-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    sizes = [s for s in (1_000, 3_000, 10_000, 30_000, 100_000, 300_000) if s <= args.max_rows]
+    print(f"{'rows':>8} {'participants':>13} {'loop (s)':>10} {'index (s)':>10} {'radar (ms)':>11} {'series':>7}")
+    for n_rows in sizes:
+        form_data = make_responses(n_rows)
+        build, index = timed(build_index, form_data)
+        fast, (data, keys) = timed(radar, index)
+        loop = "-"
+        if n_rows <= LOOP_MAX_ROWS:
+            slow, (expected, _) = timed(mask_loop, form_data, repeat=1)
+            check(index, data, expected)
+            loop = f"{slow:.3f}"
+        print(f"{n_rows:>8} {len(index):>13} {loop:>10} {build:>10.4f} {1000 * fast:>11.3f} {len(keys):>7}")
+
+
+if __name__ == "__main__":
+    main()
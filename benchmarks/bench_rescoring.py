@@ -0,0 +1,65 @@
+"""
+Bulk Re-scoring Benchmark - La Forge à Data Position
+Times rescore_responses on synthetic Form3 submissions built from the core_data bank
+
+Usage: python benchmarks/bench_rescoring.py [--participants 5000]
+"""
+
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from question_bank import SECTION_ORDER, compile_question_bank, form2_fields
+from scoring import rescore_responses
+
+BANK_CSV = ROOT / "core_data" / "Questionnaire_atelier.xlsx - Questionnaire global.csv"
+
+
+def load_bank():
+    with open(BANK_CSV, newline='', encoding='utf-8') as f:
+        records = [
+            {"id": i, "fields": form2_fields(row)}
+            for i, row in enumerate(csv.DictReader(f), start=1)
+        ]
+    return compile_question_bank(records)
+
+
+def make_submissions(bank, n_participants, profiles_each=3, seed=0):
+    """Every participant answers every section of ``profiles_each`` random profiles."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for p in range(n_participants):
+        for profile in rng.choice(bank.profiles, size=profiles_each, replace=False):
+            for section in SECTION_ORDER:
+                for q in bank.questions(profile, section):
+                    k = rng.integers(len(q.answers))
+                    rows.append((f"nom_{p}", f"prenom_{p}", f"p{p}@example.org",
+                                 q.text, q.answers[k], q.scores[k], profile))
+    return pd.DataFrame(rows, columns=['nom', 'prenom', 'mail', 'question', 'reponse', 'score', 'profile_type'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--participants", type=int, default=5000)
+    args = parser.parse_args()
+
+    bank = load_bank()
+    print(f"{'participants':>13} {'rows':>9} {'seconds':>9} {'passed':>8}")
+    for n in sorted({100, 1000, args.participants}):
+        form_data = make_submissions(bank, n)
+        start = time.perf_counter()
+        result = rescore_responses(form_data, bank)
+        elapsed = time.perf_counter() - start
+        print(f"{n:>13} {len(form_data):>9} {elapsed:>9.3f} {int(result['passed'].sum()):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Skill Search Benchmark - La Forge à Data Position
+Times SkillIndex construction and queries on synthetic skill matrices
+
+Usage: python benchmarks/bench_skill_search.py [--queries 1000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bench_teams import make_skills
+from skill_search import SkillIndex
+
+POPULATIONS = (1000, 10000, 50000)
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=1000, help="Participants queried in one batch")
+    parser.add_argument("--profiles", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'participants':>13} {'build ms':>9} {'cosine ms':>10} {'euclid ms':>10} "
+          f"{'gap ms':>7} {'batch ms':>9}")
+    for n in POPULATIONS:
+        skills = make_skills(n, args.profiles)
+        participants = pd.DataFrame({'nom': [f"nom_{i}" for i in range(n)],
+                                     'prenom': [f"prenom_{i}" for i in range(n)]})
+        profiles = [f"profil_{k}" for k in range(args.profiles)]
+
+        start = time.perf_counter()
+        index = SkillIndex(participants, profiles, skills)
+        build = (time.perf_counter() - start) * 1000
+        cosine = timed(index.similar, 0, k=10)
+        euclid = timed(index.similar, 0, k=10, metric='euclidean')
+        gap = timed(index.fill_gap, {profiles[0]: 3, profiles[1]: 2}, k=10)
+        batch = timed(index.similar, range(min(args.queries, n)), k=10)
+        print(f"{n:>13} {build:>9.1f} {cosine:>10.2f} {euclid:>10.2f} {gap:>7.2f} {batch:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Team Formation Benchmark - La Forge à Data Position
+Times form_teams on synthetic skill matrices of growing populations
+
+Usage: python benchmarks/bench_teams.py [--team-size 5] [--profiles 7]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from teams import _greedy, _team_value, team_report, form_teams
+
+POPULATIONS = (100, 1000, 5000, 10000)
+
+
+def make_skills(n_participants, n_profiles, seed=0):
+    """Each participant is evaluated on 1 to 3 profiles, with mean scores in [0, 4]."""
+    rng = np.random.default_rng(seed)
+    skills = np.zeros((n_participants, n_profiles))
+    for p in range(n_participants):
+        evaluated = rng.choice(n_profiles, size=rng.integers(1, 4), replace=False)
+        skills[p, evaluated] = rng.uniform(0, 4, size=len(evaluated))
+    return skills
+
+
+def objective(skills, team, n_teams):
+    report = team_report(list(range(skills.shape[1])), skills, team, n_teams)
+    coverage = report['Couverture'].to_numpy()
+    return _team_value(coverage[:, None]).sum(), coverage.min()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--team-size", type=int, default=5)
+    parser.add_argument("--profiles", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'participants':>13} {'teams':>6} {'greedy s':>9} {'total s':>8} "
+          f"{'greedy obj':>11} {'final obj':>10} {'min cover':>10}")
+    for n in POPULATIONS:
+        skills = make_skills(n, args.profiles)
+        n_teams = max(1, n // args.team_size)
+        capacity = np.full(n_teams, n // n_teams)
+        capacity[:n % n_teams] += 1
+
+        start = time.perf_counter()
+        greedy = _greedy(skills, capacity)
+        greedy_time = time.perf_counter() - start
+        start = time.perf_counter()
+        team = form_teams(skills, n_teams)
+        total_time = time.perf_counter() - start
+
+        greedy_obj, _ = objective(skills, greedy, n_teams)
+        final_obj, min_cover = objective(skills, team, n_teams)
+        print(f"{n:>13} {n_teams:>6} {greedy_time:>9.3f} {total_time:>8.3f} "
+              f"{greedy_obj:>11.1f} {final_obj:>10.1f} {min_cover:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Questionnaire Load Test - La Forge à Data Position
+Simulated respondents driven through pages/2_Questionnaire.py, one concurrency level at a time
+
+Every respondent goes welcome → sections → results → submit with Streamlit's
+AppTest, against the local SQLite backend or, with --grist, the GristClient
+talking to local_grist.py (injected latency and errors included). AppTest swaps process-wide state on
+each run, so concurrent respondents run in separate worker processes sharing
+the database; each worker keeps its own caches and spool, like one server
+process per worker.
+
+Usage: python benchmarks/load_test_questionnaire.py [--concurrency 1 4 16] [--sessions 5]
+       python benchmarks/load_test_questionnaire.py --grist --latency 0.08 --error-rate 0.02
+       python benchmarks/load_test_questionnaire.py --memory --sessions 10   # memory kept per session
+"""
+
+import argparse
+import gc
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# =============================================================================
+# DEFAULTS
+# =============================================================================
+PAGE = ROOT / "pages" / "2_Questionnaire.py"
+CONCURRENCY = (1, 4, 16)   # Respondents working at the same time
+SESSIONS_PER_WORKER = 5    # Respondents each worker drives one after another
+RUN_TIMEOUT = 60           # Seconds allowed for a single rerun
+DRAIN_TIMEOUT = 120        # Seconds allowed for the spool to write everything
+MAX_SUBMITS = 200          # Guard against a flow that never reaches the results
+
+
+def backend_calls():
+    """Calls made so far by this process's backend, spool flushes included."""
+    from storage import get_backend
+    return sum(m["calls"] for m in get_backend().metrics())
+
+
+def respondent(at, number, rng, latencies):
+    """Drive one AppTest session from the welcome form to the submission."""
+    def run(widget=None):
+        start = time.perf_counter()
+        (widget.run() if widget is not None else at.run())
+        latencies.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+
+    run()
+    at.text_input[0].input(f"Nom{number}")
+    at.text_input[1].input(f"Prénom{number}")
+    at.text_input[2].input(f"repondant{number}@example.org")
+    profiles = at.multiselect[0].options
+    at.multiselect[0].set_value(rng.sample(profiles, rng.randint(1, min(3, len(profiles)))))
+    run()
+    run(at.button[0].click())
+
+    for _ in range(MAX_SUBMITS):
+        if at.session_state.step != "questions":
+            break
+        for radio in at.radio:  # Inside the form (a section, one question when adaptive)
+            radio.set_value(rng.choice(radio.options))
+        run([b for b in at.button if "Valider" in b.label][0].click())
+    else:
+        raise RuntimeError("Le questionnaire n'atteint pas les résultats")
+
+    run([b for b in at.button if "Enregistrer" in b.label][0].click())
+    if not at.session_state.submitted:
+        raise RuntimeError("Soumission refusée")
+    return at.session_state.reruns  # Script runs counted by the page, st.rerun included
+
+
+def worker(worker_id, sessions, storage, workdir, seed, adaptive=False, memory=False):
+    """Run ``sessions`` respondents in this process and report what it measured.
+
+    With ``memory``, the Python allocations still alive after each session
+    (its AppTest kept open, like a browser tab) are traced with tracemalloc.
+    """
+    os.chdir(ROOT)
+    # AppTest and the reads between runs touch session state outside a script
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").disabled = True
+    from streamlit.testing.v1 import AppTest
+    from submission_spool import get_spool
+
+    secrets = {
+        **storage,
+        "spool": {"path": str(Path(workdir) / f"spool-{worker_id}")},
+        "snapshots": {"path": str(Path(workdir) / "snapshots")},
+        "questionnaire": {"adaptive": adaptive},
+    }
+    rng = random.Random(seed * 1000 + worker_id)
+    latencies, errors, submitted, script_runs, alive = [], [], [], [], []
+    retained = []
+    if memory:
+        tracemalloc.start()
+    for number in range(sessions):
+        at = AppTest.from_file(str(PAGE), default_timeout=RUN_TIMEOUT)
+        at.secrets.update(secrets)
+        try:
+            script_runs.append(respondent(at, worker_id * sessions + number, rng, latencies))
+            submitted.append(time.time())
+        except Exception as e:
+            errors.append(str(e))
+        alive.append(at)  # Open browser tabs keep their session state
+        if memory:
+            gc.collect()
+            retained.append(tracemalloc.get_traced_memory()[0])
+    if memory:
+        tracemalloc.stop()
+
+    drained = time.time()
+    if submitted:
+        spool = get_spool()  # Cached by the runs above
+        deadline = time.monotonic() + DRAIN_TIMEOUT
+        while spool.pending() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        drained = time.time() if not spool.pending() else None
+    return {
+        "latencies": latencies,
+        "errors": errors,
+        "submitted": submitted,
+        "script_runs": script_runs,
+        "drained": drained,
+        "calls": backend_calls() if latencies else 0,
+        "retained": retained,
+    }
+
+
+def percentile(values, q):
+    return 1000 * float(np.percentile(values, q)) if values else float("nan")
+
+
+def run_level(pool, concurrency, sessions, storage, workdir, seed, adaptive=False, memory=False):
+    """One concurrency level: ``concurrency`` workers, ``sessions`` respondents each."""
+    start = time.time()
+    jobs = [pool.apply_async(worker, (w, sessions, storage, workdir, seed, adaptive, memory))
+            for w in range(concurrency)]
+    results = [job.get() for job in jobs]
+
+    latencies = [x for r in results for x in r["latencies"]]
+    submitted = [t for r in results for t in r["submitted"]]
+    script_runs = [n for r in results for n in r["script_runs"]]
+    drained = [r["drained"] for r in results]
+    n_sessions = concurrency * sessions
+    # Allocations kept after the first respondent: imports and cold caches are not per-session costs
+    retained = [(r["retained"][-1] - r["retained"][0]) / (len(r["retained"]) - 1)
+                for r in results if len(r["retained"]) > 1]
+    return {
+        "concurrency": concurrency,
+        "sessions": n_sessions,
+        "errors": sum(len(r["errors"]) for r in results),
+        "first_error": next((e for r in results for e in r["errors"]), None),
+        "reruns": len(latencies),
+        "script_runs": float(np.mean(script_runs)) if script_runs else float("nan"),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "calls": sum(r["calls"] for r in results) / n_sessions,
+        "retained_kb": float(np.mean(retained)) / 1024 if retained else None,
+        "submitted_per_s": len(submitted) / (max(submitted) - start) if submitted else 0.0,
+        "written_per_s": (len(submitted) / (max(drained) - start)
+                          if submitted and all(drained) else float("nan")),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=list(CONCURRENCY))
+    parser.add_argument("--sessions", type=int, default=SESSIONS_PER_WORKER,
+                        help="Respondents driven one after another by each worker")
+    parser.add_argument("--workdir", help="Keep the database and spools here instead of a temporary directory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--adaptive", action="store_true", help="Stop sections once their outcome is decided")
+    parser.add_argument("--grist", action="store_true", help="Go through GristClient and local_grist.py")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request (--grist)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra delay, up to (--grist)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of failed requests (--grist)")
+    parser.add_argument("--memory", action="store_true",
+                        help="Trace the memory kept per session (needs --sessions 2 or more, slows the runs)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(args.workdir or tmp)
+        workdir.mkdir(parents=True, exist_ok=True)
+        database = workdir / "forge.db"
+        server = None
+        if args.grist:
+            from local_grist import LocalGristServer
+            server = LocalGristServer(database, port=0, latency=args.latency, jitter=args.jitter,
+                                      error_rate=args.error_rate, seed=args.seed)
+            storage = {"grist": {"server": server.start(), "subdomain": "", "doc_id": "local", "api_key": "local"}}
+        else:
+            from sqlite_backend import SQLiteBackend
+            SQLiteBackend(str(database))  # Seed Form2 once, outside the measurements
+            storage = {"storage": {"backend": "sqlite", "path": str(database)}}
+
+        print(f"{'concurrence':>11} {'sessions':>9} {'erreurs':>8} {'reruns':>7} {'exéc./quest.':>13} "
+              f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'appels/session':>15} {'Ko/session':>11} "
+              f"{'saisies/s':>10} {'écrites/s':>10}")
+        context = multiprocessing.get_context("spawn")  # Workers start without the parent's threads
+        for level, concurrency in enumerate(args.concurrency):
+            with context.Pool(concurrency) as pool:
+                r = run_level(pool, concurrency, args.sessions, storage, workdir / f"niveau-{level}", args.seed,
+                              args.adaptive, args.memory)
+            retained = "-" if r["retained_kb"] is None else f"{r['retained_kb']:.1f}"
+            print(f"{r['concurrency']:>11} {r['sessions']:>9} {r['errors']:>8} {r['reruns']:>7} "
+                  f"{r['script_runs']:>13.1f} {r['p50']:>8.1f} {r['p95']:>8.1f} {r['p99']:>8.1f} "
+                  f"{r['calls']:>15.1f} {retained:>11} {r['submitted_per_s']:>10.2f} "
+                  f"{r['written_per_s']:>10.2f}")
+            if r["first_error"]:
+                print(f"    première erreur : {r['first_error']}")
+        if server is not None:
+            print(f"\nlocal_grist : {server.stats['requests']} requêtes, "
+                  f"{server.stats['injected_errors']} échecs injectés")
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
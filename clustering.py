@@ -0,0 +1,120 @@
+"""
+Clustering - La Forge à Data Position
+Mini-batch k-means grouping participants' profile vectors into skill archetypes
+"""
+
+import threading
+
+import numpy as np
+
+from skill_search import get_skill_index
+
+# =============================================================================
+# DEFAULTS
+# =============================================================================
+BATCH_SIZE = 256
+FIT_BATCHES = 50       # Mini-batches drawn for a model fitted from scratch
+REFINE_BATCHES = 10    # Mini-batches drawn after new participants were added
+
+
+class MiniBatchKMeans:
+    """k-means fitted on random mini-batches with per-centroid running means.
+
+    Every centroid keeps the number of points it has absorbed, so a batch
+    moves it by ``sum(points) / count``: early batches shape it quickly,
+    later ones only nudge it. ``partial_fit`` can be called again as new
+    participants arrive without refitting the whole population.
+    """
+
+    def __init__(self, n_clusters, batch_size=BATCH_SIZE, seed=0):
+        self.n_clusters = n_clusters
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+        self.centroids = None
+        self.counts = None
+
+    def _init_centroids(self, X):
+        # k-means++ seeding on a sample: spread initial centroids apart
+        sample = X[self.rng.choice(len(X), size=min(len(X), 10 * self.n_clusters), replace=False)]
+        centroids = [sample[self.rng.integers(len(sample))]]
+        closest = ((sample - centroids[0]) ** 2).sum(axis=1)
+        for _ in range(1, self.n_clusters):
+            total = closest.sum()
+            pick = self.rng.choice(len(sample), p=closest / total) if total > 0 else self.rng.integers(len(sample))
+            centroids.append(sample[pick])
+            closest = np.minimum(closest, ((sample - sample[pick]) ** 2).sum(axis=1))
+        self.centroids = np.array(centroids, dtype=np.float64)
+        self.counts = np.zeros(self.n_clusters)
+
+    def predict(self, X):
+        """Index of the closest centroid for every row of ``X``."""
+        distances = ((X ** 2).sum(axis=1)[:, None] + (self.centroids ** 2).sum(axis=1)[None, :]
+                     - 2 * X @ self.centroids.T)
+        return distances.argmin(axis=1)
+
+    def partial_fit(self, X):
+        """Update the centroids with one batch of points."""
+        if not len(X):
+            return self
+        if self.centroids is None:
+            self._init_centroids(X)
+        labels = self.predict(X)
+        batch_counts = np.bincount(labels, minlength=self.n_clusters)
+        sums = np.zeros_like(self.centroids)
+        np.add.at(sums, labels, X)
+        moved = batch_counts > 0
+        new_counts = self.counts + batch_counts
+        self.centroids[moved] = ((self.centroids[moved] * self.counts[moved, None] + sums[moved])
+                                 / new_counts[moved, None])
+        self.counts = new_counts
+        return self
+
+    def fit(self, X, batches=FIT_BATCHES):
+        """Fit on ``batches`` mini-batches sampled from ``X``."""
+        for _ in range(batches):
+            self.partial_fit(X[self.rng.integers(len(X), size=min(self.batch_size, len(X)))])
+        return self
+
+
+class _Archetypes:
+    """A fitted model with the index it was last updated from."""
+
+    __slots__ = ("index", "model", "seen", "labels")
+
+    def __init__(self, index, model, seen, labels):
+        self.index = index
+        self.model = model
+        self.seen = seen
+        self.labels = labels
+
+
+_lock = threading.Lock()
+_archetypes = {}  # (snapshot directory, score column, profiles, n_clusters) -> _Archetypes
+
+
+def get_archetypes(store, n_clusters, score_column='score', profiles=None):
+    """Shared archetype model of a snapshot. Returns ``(index, centroids, labels)``.
+
+    When the snapshot gains participants, only the new ones and a few
+    refinement batches are fed to the existing model.
+    """
+    index = get_skill_index(store, score_column, profiles)
+    key = (str(store.directory), score_column, tuple(profiles) if profiles else None, n_clusters)
+    with _lock:
+        state = _archetypes.get(key)
+        if state is None or state.index is not index:
+            X = index.skills
+            keys = list(index.participants.itertuples(index=False, name=None))
+            size = min(n_clusters, len(X))
+            if state is None or state.model is None or state.model.n_clusters != size:
+                model = MiniBatchKMeans(size).fit(X) if size else None
+            else:
+                model = state.model
+                new = X[[k not in state.seen for k in keys]]
+                for start in range(0, len(new), model.batch_size):
+                    model.partial_fit(new[start:start + model.batch_size])
+                model.fit(X, batches=REFINE_BATCHES)
+            labels = model.predict(X) if model is not None else np.zeros(0, dtype=int)
+            state = _archetypes[key] = _Archetypes(index, model, set(keys), labels)
+        centroids = state.model.centroids.copy() if state.model is not None else np.zeros((0, len(index.profiles)))
+        return index, centroids, state.labels
@@ -0,0 +1,154 @@
+"""
+Grist Table Cache - La Forge à Data Position
+Process-wide TTL cache shared by every Streamlit session
+"""
+
+import threading
+import time
+
+# =============================================================================
+# DEFAULTS
+# =============================================================================
+DEFAULT_TTL = 30          # Seconds during which a cached table is served as-is
+DEFAULT_STALE_TTL = 300   # Extra seconds during which a stale table is served while refreshing
+
+
+class _Entry:
+    """A cached table payload with its freshness metadata."""
+
+    __slots__ = ("data", "etag", "fetched_at", "version", "refreshing")
+
+    def __init__(self, data, etag, fetched_at, version):
+        self.data = data
+        self.etag = etag
+        self.fetched_at = fetched_at
+        self.version = version
+        self.refreshing = False
+
+
+class TableCache:
+    """TTL cache with stale-while-revalidate and conditional revalidation.
+
+    ``fetch`` callables receive the last known ETag (or None) and return
+    ``(data, error, etag)``. Returning ``(None, None, etag)`` means the
+    table has not changed since that ETag (HTTP 304).
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, stale_ttl=DEFAULT_STALE_TTL):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries = {}
+        self._versions = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "not_modified": 0,
+            "errors": 0,
+            "invalidations": 0,
+        }
+
+    def configure(self, ttl=None, stale_ttl=None):
+        """Update the freshness windows (applies to existing entries too)."""
+        if ttl is not None:
+            self.ttl = ttl
+        if stale_ttl is not None:
+            self.stale_ttl = stale_ttl
+
+    def get(self, key, fetch):
+        """Return ``(data, error)`` for ``key``, fetching only when needed."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry.fetched_at
+                if age < self.ttl:
+                    self._stats["hits"] += 1
+                    return entry.data, None
+                if age < self.ttl + self.stale_ttl:
+                    self._stats["stale_hits"] += 1
+                    if not entry.refreshing:
+                        entry.refreshing = True
+                        threading.Thread(
+                            target=self._refresh, args=(key, fetch), daemon=True
+                        ).start()
+                    return entry.data, None
+            self._stats["misses"] += 1
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Only one session fetches a missing table, the others wait for it
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and time.monotonic() - entry.fetched_at < self.ttl:
+                    return entry.data, None
+            return self._refresh(key, fetch)
+
+    def _refresh(self, key, fetch):
+        """Fetch ``key`` (conditionally when an ETag is known) and store it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            etag = entry.etag if entry is not None else None
+            self._stats["refreshes"] += 1
+
+        try:
+            data, error, new_etag = fetch(etag)
+        except Exception as e:
+            data, error, new_etag = None, str(e), None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if error:
+                self._stats["errors"] += 1
+                if entry is not None:
+                    entry.refreshing = False
+                return {"records": []}, error
+
+            now = time.monotonic()
+            if data is None and entry is not None:
+                # 304 Not Modified: keep the payload, restart its TTL
+                self._stats["not_modified"] += 1
+                entry.fetched_at = now
+                entry.refreshing = False
+                return entry.data, None
+            if data is None:
+                return {"records": []}, "Réponse vide"
+
+            if entry is not None and entry.data == data:
+                data, version = entry.data, entry.version
+            else:
+                version = self._versions.get(key, 0) + 1
+                self._versions[key] = version
+            self._entries[key] = _Entry(data, new_etag, now, version)
+            return data, None
+
+    def invalidate(self, key=None):
+        """Drop one cached table (or all of them) so the next read refetches."""
+        with self._lock:
+            self._stats["invalidations"] += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def version(self, key):
+        """Monotonic version of a cached table, bumped when its content changes."""
+        with self._lock:
+            return self._versions.get(key, 0)
+
+    def stats(self):
+        """Snapshot of the hit/miss counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        served = stats["hits"] + stats["stale_hits"]
+        total = served + stats["misses"]
+        stats["hit_rate"] = served / total if total else 0.0
+        return stats
+
+
+# Shared by all sessions of the Streamlit process
+table_cache = TableCache()
@@ -0,0 +1,160 @@
+"""
+Grist Client - La Forge à Data Position
+Pooled, timeout-aware HTTP client shared by all pages
+"""
+
+import json
+import random
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from storage import TABLE_NOT_FOUND, StorageBackend
+
+# =============================================================================
+# DEFAULTS
+# =============================================================================
+DEFAULT_TIMEOUT = (3.05, 20)  # (connect, read) seconds
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5         # Seconds, doubled after each failed attempt
+DEFAULT_POOL_SIZE = 20        # Keep-alive connections kept open per process
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GristClient(StorageBackend):
+    """Thin client over the Grist REST API with a keep-alive connection pool.
+
+    GET and PATCH requests are retried with exponential backoff on connection
+    errors, timeouts and 5xx/429 responses. POST requests are only retried
+    when the connection could not be established, so a record is never
+    added twice.
+    """
+
+    def __init__(self, doc_id, api_key, server=None, subdomain="docs",
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                 backoff=DEFAULT_BACKOFF, pool_size=DEFAULT_POOL_SIZE):
+        super().__init__()
+        server = server or f"https://{subdomain}.getgrist.com"
+        self.doc_id = doc_id
+        self.base_url = f"{server.rstrip('/')}/api/docs/{doc_id}"
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"Bearer {api_key}"})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    # -------------------------------------------------------------------------
+    # Transport
+    # -------------------------------------------------------------------------
+    def _request(self, method, path, endpoint, **kwargs):
+        """Send a request, retrying transient failures. Raises on final failure."""
+        url = f"{self.base_url}/{path}"
+        kwargs.setdefault("timeout", self.timeout)
+        idempotent = method in ("GET", "HEAD", "PUT", "PATCH", "DELETE")
+
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._record(endpoint, time.perf_counter() - start, failed=True)
+                if not (idempotent or _never_sent(e)) or attempt >= self.retries:
+                    raise
+            else:
+                retryable = response.status_code in RETRY_STATUSES and idempotent
+                self._record(endpoint, time.perf_counter() - start,
+                             failed=response.status_code >= 400)
+                if not retryable or attempt >= self.retries:
+                    return response
+
+            attempt += 1
+            self._record_retry(endpoint)
+            delay = self.backoff * (2 ** (attempt - 1))
+            time.sleep(delay + random.uniform(0, delay / 2))
+
+    # -------------------------------------------------------------------------
+    # Records API
+    # -------------------------------------------------------------------------
+    def fetch_table(self, table_id, etag=None):
+        """Fetch all records of a table, conditionally when an ETag is known.
+
+        Returns ``(data, error, etag)``; ``data`` is None when not modified.
+        """
+        headers = {"If-None-Match": etag} if etag else {}
+        try:
+            response = self._request("GET", f"tables/{table_id}/records",
+                                     f"GET {table_id}", headers=headers)
+        except Exception as e:
+            return None, str(e), None
+        if response.status_code == 304:
+            return None, None, etag
+        if response.status_code != 200:
+            return None, f"Erreur {response.status_code}", None
+        data = response.json()
+        # Ensure records key exists
+        if 'records' not in data:
+            data = {"records": []}
+        return data, None, response.headers.get("ETag")
+
+    def list_records(self, table_id, filter=None, sort=None, limit=None):
+        """Read records with Grist's filter/sort/limit parameters. Returns ``(data, error)``."""
+        params = {}
+        if filter:
+            params["filter"] = json.dumps(filter)
+        if sort:
+            params["sort"] = sort
+        if limit:
+            params["limit"] = limit
+        try:
+            response = self._request("GET", f"tables/{table_id}/records",
+                                     f"GET {table_id}", params=params)
+        except Exception as e:
+            return {"records": []}, str(e)
+        if response.status_code == 404:
+            return {"records": []}, f"{TABLE_NOT_FOUND} : {table_id}"
+        if response.status_code != 200:
+            return {"records": []}, f"Erreur {response.status_code}"
+        data = response.json()
+        if 'records' not in data:
+            return {"records": []}, None
+        return data, None
+
+    def add_records(self, table_id, records):
+        """Add records (list of field dicts). Returns ``(data, error)``."""
+        payload = {"records": [{"fields": r} for r in records]}
+        try:
+            response = self._request("POST", f"tables/{table_id}/records",
+                                     f"POST {table_id}", json=payload)
+        except Exception as e:
+            return None, str(e)
+        if response.status_code == 404:
+            return None, f"{TABLE_NOT_FOUND} : {table_id}"
+        if response.status_code != 200:
+            return None, f"Erreur {response.status_code} : {response.text[:200]}"
+        return response.json(), None
+
+    def update_records(self, table_id, records):
+        """Update records given as ``{"id": ..., "fields": {...}}``. Returns ``(data, error)``."""
+        try:
+            response = self._request("PATCH", f"tables/{table_id}/records",
+                                     f"PATCH {table_id}", json={"records": records})
+        except Exception as e:
+            return None, str(e)
+        if response.status_code != 200:
+            return None, f"Erreur {response.status_code} : {response.text[:200]}"
+        return {}, None
+
+
+def _never_sent(error):
+    """True when the request failed before reaching the server (safe to resend)."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
@@ -0,0 +1,181 @@
+"""
+Question Bank Importer - La Forge à Data Position
+Bulk-load core_data CSV exports into Form2
+
+Usage:
+    export GRIST_API_KEY="your_key" && export GRIST_DOC_ID="your_doc_id"
+    python import_question_bank.py core_data/                      # every export
+    python import_question_bank.py "core_data/Questionnaire_atelier.xlsx - DPO.csv" --diff
+    python import_question_bank.py core_data/ --diff --dry-run     # show what would change
+    python import_question_bank.py core_data/ --sqlite forge.db    # local backend
+    python import_question_bank.py bank/ --diff                    # a bank built by bank_builder.py
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from bank_builder import ROW_KEY, bank_rows, is_question_bank, read_question_bank
+
+DEFAULT_CHUNK_SIZE = 200
+DEFAULT_WORKERS = 4
+
+
+def iter_bank_records(paths):
+    """Canonical Form2 fields from built banks, then from the CSV exports given."""
+    exports = []
+    for path in paths:
+        if not is_question_bank(path):
+            exports.append(path)
+            continue
+        payload, error = read_question_bank(path)
+        if error:
+            sys.exit(error)
+        yield from (record["fields"] for record in payload["records"])
+    if exports:
+        yield from bank_rows(exports)
+
+
+def stream_rows(paths):
+    """Yield canonical Form2 fields row by row, each ``ROW_KEY`` once.
+
+    A directory holding a bank built by ``bank_builder.py`` is read as is;
+    CSV exports are normalized and deduplicated on the fly.
+    """
+    seen = set()
+    for fields in iter_bank_records(paths):
+        key = tuple(fields[k] for k in ROW_KEY)
+        if key not in seen:
+            seen.add(key)
+            yield fields
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def plan_changes(rows, existing_records):
+    """Split rows into (new rows, updates) against the current Form2 content."""
+    existing = {}
+    for record in existing_records:
+        fields = record["fields"]
+        existing.setdefault(tuple(fields.get(k) for k in ROW_KEY), record)
+
+    new, updates = [], []
+    for fields in rows:
+        record = existing.get(tuple(fields[k] for k in ROW_KEY))
+        if record is None:
+            new.append(fields)
+        else:
+            changed = {k: v for k, v in fields.items() if record["fields"].get(k) != v}
+            if changed:
+                updates.append({"id": record["id"], "fields": changed})
+    return new, updates
+
+
+def run_batches(backend, table_id, batches, workers):
+    """Send (kind, chunk) batches concurrently, reporting progress per chunk.
+
+    At most ``2 * workers`` chunks are in flight, so input files are read
+    as the uploads progress instead of being loaded up front.
+    """
+    sent = failed = done = 0
+    failures = []
+    start = time.perf_counter()
+
+    def send(kind, chunk):
+        if kind == "add":
+            return backend.add_records(table_id, chunk)
+        return backend.update_records(table_id, chunk)
+
+    def report(future, in_flight):
+        nonlocal sent, failed, done
+        i, kind, size = in_flight.pop(future)
+        _, error = future.result()
+        done += 1
+        if error:
+            failed += size
+            failures.append((i, kind, size, error))
+            status = f"ÉCHEC ({error})"
+        else:
+            sent += size
+            status = "ok"
+        elapsed = time.perf_counter() - start
+        print(f"[{done}] chunk {i} {kind:<6} {size:>4} lignes {status} "
+              f"— {sent / elapsed if elapsed else 0:,.0f} lignes/s", flush=True)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+        for i, (kind, chunk) in enumerate(batches, start=1):
+            if len(in_flight) >= 2 * workers:
+                report(next(as_completed(in_flight)), in_flight)
+            in_flight[pool.submit(send, kind, chunk)] = (i, kind, len(chunk))
+        while in_flight:
+            report(next(as_completed(in_flight)), in_flight)
+
+    return sent, failed, failures, time.perf_counter() - start
+
+
+def make_backend(args):
+    if args.sqlite:
+        from sqlite_backend import SQLiteBackend
+        return SQLiteBackend(args.sqlite)
+    from grist_client import GristClient
+    doc_id = os.environ.get("GRIST_DOC_ID")
+    api_key = os.environ.get("GRIST_API_KEY")
+    if not doc_id or not api_key:
+        sys.exit("GRIST_DOC_ID et GRIST_API_KEY doivent être définis (ou utilisez --sqlite).")
+    return GristClient(doc_id, api_key, subdomain=os.environ.get("GRIST_SUBDOMAIN", "docs"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importe les questions de core_data dans Form2.")
+    parser.add_argument("paths", nargs="+", help="Fichiers CSV, dossiers (ex. core_data/) ou banque construite")
+    parser.add_argument("--table", default="Form2")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--diff", action="store_true", help="N'envoie que les lignes nouvelles ou modifiées")
+    parser.add_argument("--dry-run", action="store_true", help="Affiche les changements sans rien envoyer")
+    parser.add_argument("--sqlite", metavar="PATH", help="Importe dans une base SQLite locale")
+    args = parser.parse_args(argv)
+
+    backend = make_backend(args)
+    rows = stream_rows(args.paths)
+
+    if args.diff:
+        data, error = backend.list_records(args.table)
+        if error:
+            sys.exit(f"Impossible de lire {args.table} : {error}")
+        new, updates = plan_changes(rows, data["records"])
+        print(f"{len(new)} nouvelle(s) ligne(s), {len(updates)} ligne(s) modifiée(s)")
+        batches = ([("add", c) for c in chunked(new, args.chunk_size)]
+                   + [("update", c) for c in chunked(updates, args.chunk_size)])
+    else:
+        batches = (("add", c) for c in chunked(rows, args.chunk_size))
+
+    if args.dry_run:
+        for kind, chunk in batches:
+            for record in chunk:
+                fields = record.get("fields", record)
+                print(f"{'+' if kind == 'add' else '~'} {fields}")
+        return 0
+
+    sent, failed, failures, elapsed = run_batches(backend, args.table, batches, args.workers)
+    print(f"\n{sent} ligne(s) envoyée(s) en {elapsed:.2f}s "
+          f"({sent / elapsed if elapsed else 0:,.0f} lignes/s), {failed} en échec")
+    for i, kind, size, error in failures:
+        print(f"  chunk {i} ({kind}, {size} lignes) : {error}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Lazy Data - La Forge à Data Position
+Per-rerun data dependencies, loaded only when a page section asks for them
+"""
+
+import time
+
+from storage import load_table, submit_tables
+from timing import spans
+
+
+class LazyData:
+    """Named tables and derived values resolved on first use within a rerun.
+
+    Tables and derived values are declared up front but nothing is fetched
+    or computed until ``get`` asks for them. Every resolution is recorded
+    in ``report`` with the reason it was requested, so a rerun shows what
+    it loaded and why; with a ``page`` name, its duration also goes to
+    that page's timing spans.
+    """
+
+    def __init__(self, page=None):
+        self.page = page
+        self._tables = set()
+        self._derived = {}   # name -> (function, required names)
+        self._pending = {}   # table name -> future started by prefetch
+        self._values = {}    # name -> (value, error)
+        self.report = []
+
+    def table(self, name):
+        """Declare a table read through the shared cache."""
+        self._tables.add(name)
+
+    def derive(self, name, function, requires=(), kind="dérivée"):
+        """Declare a value computed from other resources.
+
+        ``function`` receives the required values in order and returns
+        ``(value, error)``; it is not called if a requirement failed.
+        """
+        self._derived[name] = (function, tuple(requires), kind)
+
+    def prefetch(self, *names, reason):
+        """Start fetching tables in the background, before they are needed."""
+        missing = [n for n in names if n in self._tables and n not in self._values and n not in self._pending]
+        for name, future in submit_tables(*missing).items():
+            self._pending[name] = (future, reason, time.perf_counter())
+
+    def get(self, name, reason):
+        """Return ``(value, error)`` for ``name``, loading it on first use."""
+        if name in self._values:
+            return self._values[name]
+
+        if name in self._pending:
+            future, reason, start = self._pending.pop(name)
+            result = future.result()
+        elif name in self._tables:
+            start = time.perf_counter()
+            result = load_table(name)
+        else:
+            function, requires, _ = self._derived[name]
+            inputs = [self.get(dep, f"requis par {name}") for dep in requires]
+            errors = [error for _, error in inputs if error]
+            # Timed after the requirements, which have their own report rows
+            start = time.perf_counter()
+            result = (None, errors[0]) if errors else function(*(value for value, _ in inputs))
+
+        self._values[name] = result
+        elapsed = time.perf_counter() - start
+        kind = "table" if name in self._tables else self._derived[name][2]
+        if self.page:
+            spans.observe(self.page, f"{kind} {name}", elapsed)
+        self.report.append({
+            "Ressource": name,
+            "Type": kind,
+            "Raison": reason,
+            "Durée (ms)": round(elapsed * 1000, 1),
+            "Erreur": result[1] or "",
+        })
+        return result
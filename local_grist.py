@@ -0,0 +1,247 @@
+"""
+Local Grist Server - La Forge à Data Position
+Grist-compatible HTTP stand-in backed by SQLite, with injected latency and errors
+
+Usage:
+    python local_grist.py --db forge.db --port 8484
+    python local_grist.py --db forge.db --latency 0.08 --jitter 0.04 --error-rate 0.02
+
+Then point the app at it in secrets.toml:
+    [grist]
+    server = "http://127.0.0.1:8484"
+    subdomain = ""
+    doc_id = "local"
+    api_key = "local"
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from sqlite_backend import SQLiteBackend
+
+# =============================================================================
+# DEFAULTS
+# =============================================================================
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8484
+DEFAULT_ERROR_STATUS = 503   # Retryable for GristClient's GET/PATCH
+_ROUTE = re.compile(r"^/api/docs/([^/]+)/tables/([^/]+)/(records|data)$")
+
+
+def to_columns(records):
+    """Grist records to the columnar ``/data`` format: ``{"id": [...], column: [...]}``."""
+    names = list(dict.fromkeys(name for r in records for name in r["fields"]))
+    columns = {"id": [r["id"] for r in records]}
+    for name in names:
+        columns[name] = [r["fields"].get(name) for r in records]
+    return columns
+
+
+def from_columns(columns):
+    """Columnar ``/data`` payload to a list of ``(id or None, fields)``."""
+    ids = columns.get("id")
+    names = [name for name in columns if name != "id"]
+    size = len(ids) if ids is not None else max((len(columns[n]) for n in names), default=0)
+    return [(ids[i] if ids is not None else None, {n: columns[n][i] for n in names})
+            for i in range(size)]
+
+
+class LocalGristServer:
+    """Serves ``/api/docs/{doc}/tables/{table}/records`` and ``/data`` from a SQLite file.
+
+    GET supports Grist's ``filter``, ``sort`` and ``limit`` parameters and
+    answers ``If-None-Match`` with 304 from the per-table version. Every
+    request first sleeps ``latency`` plus up to ``jitter`` seconds, then
+    fails with ``error_status`` with probability ``error_rate``; both draws
+    come from a seeded generator, so a run can be replayed.
+    """
+
+    def __init__(self, db_path, host=DEFAULT_HOST, port=DEFAULT_PORT, latency=0.0, jitter=0.0,
+                 error_rate=0.0, error_status=DEFAULT_ERROR_STATUS, api_key=None, seed=0):
+        self.backend = SQLiteBackend(db_path)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.api_key = api_key
+        self.stats = {"requests": 0, "injected_errors": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.standin = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve from a background thread. Returns the base URL."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="local-grist", daemon=True)
+        self._thread.start()
+        return self.url
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _draw(self):
+        """Delay and whether to fail, for one request."""
+        with self._lock:
+            self.stats["requests"] += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            fail = self._rng.random() < self.error_rate
+            self.stats["injected_errors"] += int(fail)
+        return delay, fail
+
+    # -------------------------------------------------------------------------
+    # Endpoints: return (status, body, headers)
+    # -------------------------------------------------------------------------
+    def get(self, table_id, kind, query, etag):
+        params = {k: v[0] for k, v in parse_qs(query).items()}
+        try:
+            filter = json.loads(params["filter"]) if "filter" in params else None
+            limit = int(params["limit"]) if "limit" in params else None
+        except ValueError as e:
+            return 400, {"error": f"Invalid parameter: {e}"}, {}
+        if filter is not None and not (isinstance(filter, dict) and all(isinstance(v, list) for v in filter.values())):
+            return 400, {"error": "Invalid parameter: filter must map column names to lists of values"}, {}
+        if not self.backend.has_table(table_id):
+            return 404, {"error": f"Table not found \"{table_id}\""}, {}
+
+        headers = {}
+        if filter is None and "sort" not in params and limit is None:
+            data, error, new_etag = self.backend.fetch_table(table_id, etag)
+            if error is None and data is None:
+                return 304, None, {"ETag": new_etag}
+            headers["ETag"] = new_etag
+        else:
+            data, error = self.backend.list_records(table_id, filter, params.get("sort"), limit)
+        if error:
+            return 400, {"error": error}, {}
+        body = to_columns(data["records"]) if kind == "data" else data
+        return 200, body, headers
+
+    def post(self, table_id, kind, payload):
+        if not self.backend.has_table(table_id):
+            return 404, {"error": f"Table not found \"{table_id}\""}, {}
+        if kind == "data":
+            records = [fields for _, fields in from_columns(payload)]
+        else:
+            records = [r.get("fields", {}) for r in payload.get("records", [])]
+        data, error = self.backend.add_records(table_id, records)
+        if error:
+            return 400, {"error": error}, {}
+        ids = [r["id"] for r in data["records"]]
+        return 200, (ids if kind == "data" else {"records": [{"id": i} for i in ids]}), {}
+
+    def patch(self, table_id, kind, payload):
+        if not self.backend.has_table(table_id):
+            return 404, {"error": f"Table not found \"{table_id}\""}, {}
+        if kind == "data":
+            records = [{"id": i, "fields": fields} for i, fields in from_columns(payload)]
+        else:
+            records = payload.get("records", [])
+        if any(r.get("id") is None for r in records):
+            return 400, {"error": "Every record needs an id"}, {}
+        _, error = self.backend.update_records(table_id, records)
+        if error:
+            return 400, {"error": error}, {}
+        return 200, None, {}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the pooled GristClient expects
+    # Headers and body go out in separate writes: without TCP_NODELAY, the body waits
+    # for the client's delayed ACK (~40 ms) on every keep-alive request
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=None, headers=None):
+        content = b"" if body is None else json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(content)
+
+    def _handle(self, method):
+        standin = self.server.standin
+        url = urlparse(self.path)
+        match = _ROUTE.match(url.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""  # Always drained: the connection is reused
+        if not match:
+            return self._send(404, {"error": f"Unknown endpoint {url.path}"})
+        if standin.api_key and self.headers.get("Authorization") != f"Bearer {standin.api_key}":
+            return self._send(401, {"error": "Unauthorized"})
+
+        delay, fail = standin._draw()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            return self._send(standin.error_status, {"error": "Injected failure"})
+
+        _, table_id, kind = match.groups()
+        if method == "GET":
+            return self._send(*standin.get(table_id, kind, url.query, self.headers.get("If-None-Match")))
+        try:
+            payload = json.loads(raw or b"{}")
+        except ValueError:
+            return self._send(400, {"error": "Invalid JSON body"})
+        handler = standin.post if method == "POST" else standin.patch
+        return self._send(*handler(table_id, kind, payload))
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serveur local compatible Grist, adossé à SQLite.")
+    parser.add_argument("--db", default="forge.db", help="Base SQLite (créée et amorcée si absente)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="Délai ajouté à chaque requête (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Délai aléatoire supplémentaire, jusqu'à (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Part des requêtes en échec (0-1)")
+    parser.add_argument("--error-status", type=int, default=DEFAULT_ERROR_STATUS)
+    parser.add_argument("--api-key", help="Exige ce jeton Bearer (par défaut, tout jeton est accepté)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = LocalGristServer(args.db, args.host, args.port, args.latency, args.jitter,
+                              args.error_rate, args.error_status, args.api_key, args.seed)
+    print(f"Serveur Grist local sur {server.url} (base {args.db})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,26 @@ For data team leads to create and manage Data Positions
 import sys
 sys.path.insert(0, '..')
 
+import json
+import time
 import pandas as pd
 import streamlit as st
 from streamlit_elements import nivo, elements, mui
-from grist_api import GristDocAPI
-import requests
 import numpy as np
 from styles import inject_styles
+from grist_cache import table_cache
+from storage import get_backend
+from lazy_data import LazyData
+from submission_spool import get_spool
+from response_sync import get_response_sync
+from analytics import MAX_RADAR_SERIES, RADAR_MODES, participant_summary, reduce_radar, series_radar, table_page
+from question_bank import get_question_bank
+from scoring import (PASS_THRESHOLD, adaptive_rows, backfill_id, rescore_responses, summarize_responses,
+                     summary_table)
+from skill_search import MAX_CANDIDATES, get_skill_index
+from clustering import get_archetypes
+from teams import assignment_rows, form_teams, skill_matrix, team_report, teams_table
+from timing import get_metrics_exporter, spans
 
 # Page configuration
 st.set_page_config(
@@ -21,9 +34,12 @@ st.set_page_config(
     layout='wide',
     initial_sidebar_state='collapsed'
 )
+rerun_start = time.perf_counter()
+get_metrics_exporter()
 
 # Inject custom styles (hide sidebar)
-inject_styles(hide_sidebar=True)
+with spans.span("Admin", "inject_styles"):
+    inject_styles(hide_sidebar=True)
 
 # Top navigation bar
 st.markdown("""
@@ -87,45 +103,26 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# Load secrets
-SERVER = st.secrets["grist"]["server"]
-DOC_ID = st.secrets["grist"]["doc_id"]
-API_KEY = st.secrets["grist"]["api_key"]
-subdomain = st.secrets["grist"]["subdomain"]
-
-api = GristDocAPI(DOC_ID, server=SERVER, api_key=API_KEY)
-headers = {"Authorization": f"Bearer {API_KEY}"}
-
-
-def load_grist_table(table_name):
-    """Load a table from Grist with error handling."""
-    url = f"https://{subdomain}.getgrist.com/api/docs/{DOC_ID}/tables/{table_name}/records"
-    try:
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            data = response.json()
-            # Ensure records key exists
-            if 'records' not in data:
-                return {"records": []}, None
-            return data, None
-        return {"records": []}, f"Erreur {response.status_code}"
-    except Exception as e:
-        return {"records": []}, str(e)
-
-
-# Load data
-data2, _ = load_grist_table("Form2")  # Master questions
-data3, _ = load_grist_table("Form3")  # Responses
-data0, _ = load_grist_table("Form0")  # Custom questions
+# Data dependencies: declared here, loaded only when a tab asks for them
+data = LazyData(page="Admin")
+data.table("Form2")  # Master questions
+data.derive("question_bank", lambda data2: (get_question_bank(data2), None), requires=["Form2"])
+if 'table_id' in st.session_state:
+    # Responses and their per-participant summary, read from synced snapshots
+    for responses_table in (st.session_state.table_id, summary_table(st.session_state.table_id)):
+        data.derive(
+            responses_table,
+            lambda t=responses_table: get_response_sync(t).refresh(full=st.session_state.get("full_resync", False)),
+            kind="synchro",
+        )
 
 # Session state
-if 'selected_data' not in st.session_state:
-    st.session_state.selected_data = {}
 if 'profiles' not in st.session_state:
     st.session_state.profiles = []
 
 # Tabs
-tab1, tab2 = st.tabs(["📋 Qualification", "📊 Position"])
+# Switching tabs reruns the page so that only the open tab loads its data
+tab1, tab2, tab3 = st.tabs(["📋 Qualification", "📊 Position", "👥 Dispenser"], key="admin_tab", on_change="rerun")
 
 # =============================================================================
 # TAB 1: QUALIFICATION
@@ -173,10 +170,14 @@ with tab1:
             )
 
             if st.button("Charger ce Data Position", type="primary", key="load_master"):
-                st.session_state.profiles = profiles
-                st.session_state.selected_data = data2
-                st.session_state.table_id = "Form3"
-                st.success("Data Position chargé ! Partagez maintenant le lien Questionnaire avec vos collaborateurs.")
+                # Only the selection is kept per session: questions live in the shared question bank
+                _, error = data.get("question_bank", "Chargement du Data Position maître")
+                if error:
+                    st.error(f"Impossible de charger les questions : {error}")
+                else:
+                    st.session_state.profiles = profiles
+                    st.session_state.table_id = "Form3"
+                    st.success("Data Position chargé ! Partagez maintenant le lien Questionnaire avec vos collaborateurs.")
 
     with col2:
         with st.container(border=True):
@@ -208,28 +209,47 @@ with tab1:
 with tab2:
     st.title("Position de votre équipe")
 
-    if 'table_id' not in st.session_state:
+    if not tab2.open:
+        pass  # Every tab body runs on each rerun: load nothing until Position is open
+    elif 'table_id' not in st.session_state:
         st.warning("Veuillez d'abord charger un Data Position dans l'onglet Qualification")
     else:
-        # Load responses
+        # Sync the local snapshot (only rows added since the last sync are
+        # downloaded), then read the selected profiles from it.
+        # The compact summary table is read by default, raw answers on demand.
         table_id = st.session_state.table_id
-        url = f"https://{subdomain}.getgrist.com/api/docs/{DOC_ID}/tables/{table_id}/records"
-        response = requests.get(url, headers=headers)
-
-        if response.status_code != 200:
-            st.error(f"Erreur lors du chargement : {response.status_code}")
+        drilldown = st.toggle("Détail par question", key="drilldown",
+                              help="Lit les réponses brutes au lieu du résumé par participant")
+        where = {'profile_type': st.session_state.profiles} if st.session_state.get('profiles') else None
+        weight = None
+        if not drilldown:
+            snapshot, error = data.get(summary_table(table_id), "Onglet Position (résumé)")
+            if error:
+                # Documents created before the summary table existed have none yet
+                st.caption(f"Résumé indisponible ({error}) : lecture des réponses brutes.")
+                drilldown = True
+            elif not snapshot.num_rows:
+                st.caption("Résumé vide : lecture des réponses brutes.")
+                drilldown = True
+            else:
+                weight = 'answer_count'
+        if drilldown:
+            # Re-scoring needs the question bank: fetch Form2 while responses sync
+            data.prefetch("Form2", reason="Recalcul des qualifications")
+            snapshot, error = data.get(table_id, "Onglet Position (détail par question)")
+        st.button("🔄 Resynchroniser", key="full_resync")
+
+        if error:
+            st.error(f"Erreur lors du chargement : {error}")
         else:
-            data = response.json()
-            if not data.get('records'):
+            if not snapshot.num_rows:
                 st.info("Aucune réponse pour le moment. Partagez le questionnaire avec vos collaborateurs.")
             else:
-                records = data['records']
-                form_data = pd.json_normalize(records, sep='_')
-                form_data.columns = [col.replace('fields_', '') for col in form_data.columns]
-
-                # Filter by selected profiles if any
-                if st.session_state.get('profiles'):
-                    form_data = form_data[form_data['profile_type'].isin(st.session_state.profiles)]
+                # Only the selected profiles are read from the snapshot
+                with spans.span("Admin", "snapshot_query"):
+                    form_data = snapshot.query(where=where)
+                    if weight:
+                        form_data = form_data.rename(columns={'mean_score': 'score'})
 
                 if form_data.empty:
                     st.info("Aucune donnée pour les profils sélectionnés.")
@@ -237,30 +257,53 @@ with tab2:
                     st.markdown("### Radar de compétences")
                     st.caption("Visualisez la distribution des profils data de votre équipe")
 
-                    # Build radar data
-                    unique_noms = form_data['nom'].unique()
-                    unique_noms = [n for n in unique_noms if n]  # Remove empty names
-
-                    if not unique_noms:
+                    # Radar series are reduced server-side, so the payload holds at most
+                    # MAX_RADAR_SERIES series whatever the number of participants
+                    score_column = 'mean_score' if weight else 'score'
+                    with spans.span("Admin", "skill_index"):
+                        index = get_skill_index(snapshot, score_column, st.session_state.get('profiles'))
+                    radar_mode = st.selectbox("Séries du radar", list(RADAR_MODES), format_func=RADAR_MODES.get,
+                                              key="radar_mode")
+                    if radar_mode == 'archetypes':
+                        n_archetypes = st.slider("Nombre d'archétypes", 2, 8, 4, key="n_archetypes",
+                                                 help="Regroupe les participants aux scores proches (k-means)")
+                        with spans.span("Admin", "archetypes"):
+                            index, centroids, labels = get_archetypes(snapshot, n_archetypes, score_column,
+                                                                      st.session_state.get('profiles'))
+                        sizes = np.bincount(labels, minlength=len(centroids))
+                        names = [f"Archétype {i + 1} ({n})" for i, n in enumerate(sizes)]
+                        values = centroids
+                    else:
+                        top_n, selected = MAX_RADAR_SERIES, ()
+                        if radar_mode == 'top':
+                            top_n = st.slider("Nombre de participants", 1, MAX_RADAR_SERIES, 10, key="radar_top_n")
+                        elif radar_mode == 'subset':
+                            # Only the participants matching the search are sent as options
+                            chosen = [i for i in st.session_state.get("radar_subset", []) if i < len(index)]
+                            st.session_state.radar_subset = chosen
+                            found, matches = index.search(st.text_input("Rechercher des participants",
+                                                                        key="radar_subset_search",
+                                                                        placeholder="Nom ou prénom"))
+                            selected = st.multiselect("Participants", list(dict.fromkeys(chosen + found.tolist())),
+                                                      format_func=index.labels.__getitem__,
+                                                      max_selections=MAX_RADAR_SERIES, key="radar_subset")
+                            if matches > MAX_CANDIDATES:
+                                st.caption(f"{MAX_CANDIDATES} premiers sur {matches} : affinez la recherche.")
+                        with spans.span("Admin", "radar_reduce"):
+                            names, values = reduce_radar(radar_mode, index.labels, index.skills, index.evaluated,
+                                                         top_n=top_n, selected=selected)
+                    with spans.span("Admin", "radar_series"):
+                        DATA, radar_keys = series_radar(index.profiles, names, values)
+                    st.caption(f"{len(radar_keys)} série(s) • {len(json.dumps(DATA)) / 1024:.1f} Ko envoyés au graphique")
+
+                    if not len(index):
                         st.info("Aucun participant identifié dans les réponses.")
                     else:
-                        DATA = []
-                        for profile_type in form_data['profile_type'].unique():
-                            if not profile_type:
-                                continue
-                            profile_data = {"profile": profile_type}
-                            for nom in unique_noms:
-                                filtered = form_data[(form_data['nom'] == nom) & (form_data['profile_type'] == profile_type)]
-                                if not filtered.empty:
-                                    score = filtered['score'].mean() if 'score' in filtered.columns else 0
-                                    profile_data[nom] = score
-                            DATA.append(profile_data)
-
-                        with elements("radar_chart"):
+                        with spans.span("Admin", "radar_render"), elements("radar_chart"):
                             with mui.Box(sx={"height": 500}):
                                 nivo.Radar(
                                     data=DATA,
-                                    keys=list(unique_noms),
+                                    keys=list(radar_keys),
                                     indexBy="profile",
                                     maxValue=4,
                                     valueFormat=">-.2f",
@@ -289,11 +332,217 @@ with tab2:
                                     }
                                 )
 
-                        # Summary table
+                        # Summary table: filtered, sorted and paginated server-side,
+                        # only the visible page is sent to the browser
                         st.markdown("### Participants")
-                        summary = form_data.groupby(['nom', 'prenom']).agg({
-                            'score': 'mean',
-                            'profile_type': lambda x: ', '.join(x.unique())
-                        }).reset_index()
-                        summary.columns = ['Nom', 'Prénom', 'Score moyen', 'Profils']
-                        st.dataframe(summary, use_container_width=True)
+                        with spans.span("Admin", "participant_summary"):
+                            summary = participant_summary(form_data, weight=weight)
+                        col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+                        search = col1.text_input("Filtrer", key="participants_search",
+                                                 placeholder="Nom, prénom ou profil")
+                        sort_by = col2.selectbox("Trier par", list(summary.columns), key="participants_sort")
+                        ascending = col3.toggle("Croissant", value=True, key="participants_ascending")
+                        page_size = col4.selectbox("Lignes", [25, 50, 100], key="participants_page_size")
+                        with spans.span("Admin", "participants_page"):
+                            rows, matches, pages = table_page(summary, st.session_state.get("participants_page", 1),
+                                                              page_size, sort_by, ascending, search)
+                        if st.session_state.get("participants_page", 1) > pages:
+                            st.session_state.participants_page = pages
+                        st.dataframe(rows, width="stretch", hide_index=True)
+                        col1, col2 = st.columns([1, 3])
+                        col1.number_input(f"Page (sur {pages})", min_value=1, max_value=pages, key="participants_page")
+                        col2.caption(f"{matches} participant(s) sur {len(summary)}")
+
+                        # Nearest neighbours and gap filling over profile vectors
+                        if len(index) > 1:
+                            st.markdown("### Recherche de profils")
+                            col1, col2 = st.columns(2)
+                            with col1:
+                                st.caption("Qui ressemble à ce participant ?")
+                                found, matches = index.search(st.text_input("Rechercher un participant",
+                                                                            key="similar_search",
+                                                                            placeholder="Nom ou prénom"))
+                                # The current choice stays an option while the search changes
+                                current = st.session_state.get("similar_to")
+                                if current is not None and current >= len(index):
+                                    del st.session_state.similar_to
+                                    current = None
+                                options = list(dict.fromkeys(([] if current is None else [current]) + found.tolist()))
+                                who = st.selectbox("Participant", options, format_func=index.labels.__getitem__,
+                                                   key="similar_to")
+                                if matches > MAX_CANDIDATES:
+                                    st.caption(f"{MAX_CANDIDATES} premiers sur {matches} : affinez la recherche.")
+                                metric = st.radio("Mesure", ["cosine", "euclidean"], horizontal=True,
+                                                  format_func={"cosine": "Cosinus", "euclidean": "Distance euclidienne"}.get,
+                                                  key="similar_metric")
+                                if who is None:
+                                    st.info("Aucun participant ne correspond à la recherche.")
+                                else:
+                                    with spans.span("Admin", "similar"):
+                                        indices, scores = index.similar(who, k=5, metric=metric)
+                                    column = "Similarité" if metric == "cosine" else "Distance"
+                                    st.dataframe(index.frame(indices[0], scores[0], column).round(2),
+                                                 width="stretch", hide_index=True)
+                            with col2:
+                                st.caption("Qui comble le mieux un besoin ?")
+                                need = st.selectbox("Profil recherché", index.profiles, key="gap_profile")
+                                level = st.slider("Niveau visé", 0.5, 4.0, 3.0, 0.5, key="gap_level")
+                                with spans.span("Admin", "fill_gap"):
+                                    indices, fill = index.fill_gap({need: level}, k=5)
+                                st.dataframe(index.frame(indices, fill, "Besoin couvert").round(2),
+                                             width="stretch", hide_index=True)
+
+                    # Re-score past submissions against the current question bank
+                    if drilldown:
+                        with st.expander("♻️ Recalculer les qualifications"):
+                            st.caption("Applique les scores actuels du Data Position et le seuil choisi à toutes les réponses enregistrées.")
+                            threshold = st.slider("Seuil de réussite par section", 0.0, 1.0, PASS_THRESHOLD, 0.05,
+                                                  key="rescore_threshold")
+                            question_bank, bank_error = data.get("question_bank", "Recalcul des qualifications")
+                            if bank_error:
+                                st.error(f"Erreur lors du chargement des questions : {bank_error}")
+                            else:
+                                with spans.span("Admin", "rescore"):
+                                    rescored = rescore_responses(form_data, question_bank, threshold)
+                                adaptive_answers = int(adaptive_rows(form_data).sum())
+                                if adaptive_answers:
+                                    st.caption(f"{adaptive_answers} réponse(s) du mode adaptatif ne sont pas recalculées : "
+                                               "leur résultat par section est celui enregistré dans le résumé.")
+                                if rescored.empty:
+                                    st.info("Aucune réponse ne correspond aux questions actuelles.")
+                                else:
+                                    st.metric("Qualifications", f"{int(rescored['passed'].sum())} / {len(rescored)}")
+                                    st.dataframe(rescored, width="stretch", hide_index=True)
+                                    if st.button("Compléter le résumé par participant", key="backfill_summary",
+                                                 help="Ajoute au résumé les participants enregistrés avant sa création"):
+                                        rows = summarize_responses(form_data, question_bank, threshold)
+                                        existing = get_response_sync(summary_table(table_id)).store.query(
+                                            columns=['nom', 'prenom', 'mail', 'profile_type'])
+                                        if not existing.empty:
+                                            on = list(existing.columns)
+                                            known = rows[on].merge(existing.astype(str).drop_duplicates(), how='left', indicator=True)
+                                            rows = rows[(known['_merge'] == 'left_only').to_numpy()]
+                                        if rows.empty:
+                                            st.info("Le résumé est déjà complet.")
+                                        else:
+                                            get_spool().enqueue(summary_table(table_id), json.loads(rows.to_json(orient='records')),
+                                                                submission_id=backfill_id(rows))
+                                            st.success(f"{len(rows)} ligne(s) de résumé en cours d'écriture.")
+
+# =============================================================================
+# TAB 3: DISPENSER (Team formation)
+# =============================================================================
+with tab3:
+    st.title("Répartir votre population en équipes")
+
+    if not tab3.open:
+        pass  # Loads nothing until Dispenser is open
+    elif 'table_id' not in st.session_state:
+        st.warning("Veuillez d'abord charger un Data Position dans l'onglet Qualification")
+    else:
+        # Per-profile scores come from the summary, or raw answers while it is empty or missing
+        table_id = st.session_state.table_id
+        where = {'profile_type': st.session_state.profiles} if st.session_state.get('profiles') else None
+        snapshot, error = data.get(summary_table(table_id), "Onglet Dispenser (scores par profil)")
+        score_column = 'mean_score'
+        if error or not snapshot.num_rows:
+            snapshot, error = data.get(table_id, "Onglet Dispenser (résumé vide ou absent)")
+            score_column = 'score'
+
+        if error:
+            st.error(f"Erreur lors du chargement : {error}")
+        elif not snapshot.num_rows:
+            st.info("Aucune réponse pour le moment. Partagez le questionnaire avec vos collaborateurs.")
+        else:
+            with spans.span("Admin", "skill_matrix"):
+                participants, profiles, skills = skill_matrix(snapshot.query(where=where), score_column)
+            st.caption(f"{len(participants)} participant(s) évalué(s) sur {len(profiles)} profil(s). "
+                       "Chaque équipe couvre un profil avec le meilleur score de ses membres.")
+            n_teams = st.number_input("Nombre d'équipes", min_value=1, max_value=max(1, len(participants)),
+                                      value=max(1, min(len(participants), -(-len(participants) // 5))),
+                                      key="n_teams")
+
+            if st.button("Former les équipes", type="primary", key="form_teams", disabled=not len(participants)):
+                with spans.span("Admin", "form_teams"):
+                    team = form_teams(skills, int(n_teams))
+                st.session_state.team_assignment = assignment_rows(participants, team)
+                st.session_state.team_report = team_report(profiles, skills, team)
+
+            if 'team_assignment' in st.session_state:
+                report = st.session_state.team_report
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Équipes", len(report))
+                col2.metric("Couverture moyenne", f"{report['Couverture'].mean():.2f}")
+                col3.metric("Couverture minimale", f"{report['Couverture'].min():.2f}")
+                st.dataframe(report.round(2), width="stretch", hide_index=True)
+                with st.expander("Membres par équipe"):
+                    st.dataframe(st.session_state.team_assignment.sort_values('team'),
+                                 width="stretch", hide_index=True)
+                if st.button("Enregistrer la répartition", key="save_teams"):
+                    assignment = st.session_state.team_assignment
+                    get_spool().enqueue(teams_table(table_id), json.loads(assignment.to_json(orient='records')))
+                    st.success(f"Répartition de {len(assignment)} participant(s) en cours d'écriture.")
+
+# =============================================================================
+# DIAGNOSTICS
+# =============================================================================
+with st.expander("🔧 Cache Grist"):
+    cache_stats = table_cache.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Hits", cache_stats["hits"] + cache_stats["stale_hits"])
+    col2.metric("Misses", cache_stats["misses"])
+    col3.metric("Non modifiées (304)", cache_stats["not_modified"])
+    col4.metric("Taux de hit", f"{cache_stats['hit_rate']*100:.0f}%")
+    st.caption(f"TTL : {table_cache.ttl}s • Tables en cache : {cache_stats['entries']} • Erreurs : {cache_stats['errors']}")
+    client_metrics = get_backend().metrics()
+    if client_metrics:
+        st.caption("Appels au stockage (latences en ms)")
+        st.dataframe(pd.DataFrame(client_metrics).round(1), width="stretch", hide_index=True)
+    spool = get_spool()
+    st.caption(
+        f"Soumissions en attente d'écriture : {len(spool.pending())} • "
+        f"Écrites : {spool.stats['flushed']} • Échecs : {spool.stats['failures']}"
+        + (f" • Lignes ignorées (table absente) : {spool.stats['records_dropped']}"
+           if spool.stats['records_dropped'] else "")
+    )
+    if spool.stats["last_error"]:
+        st.caption(f"Dernière erreur d'écriture : {spool.stats['last_error']}")
+    st.caption("Données chargées pendant cette exécution")
+    if data.report:
+        st.dataframe(pd.DataFrame(data.report), width="stretch", hide_index=True)
+    else:
+        st.caption("Aucune : l'onglet affiché n'a rien lu.")
+    if st.button("Vider le cache", key="clear_cache"):
+        table_cache.invalidate()
+        st.rerun()
+
+with st.expander("⏱️ Temps d'exécution"):
+    st.caption("Étapes des exécutions de toutes les sessions depuis le démarrage "
+               "(quantiles estimés à partir des histogrammes)")
+    timings = spans.summary()
+    if timings:
+        st.dataframe(pd.DataFrame(timings), width="stretch", hide_index=True)
+    else:
+        st.caption("Aucune mesure pour le moment.")
+    reruns = spans.reruns_summary()
+    if reruns["completed"]:
+        st.caption(f"Questionnaires complétés : {reruns['completed']} • Exécutions par questionnaire : "
+                   f"{reruns['mean']:.0f} en moyenne, p50 {reruns['p50']:.0f}, p95 {reruns['p95']:.0f}, "
+                   f"max {reruns['max']:.0f}")
+    exporter = get_metrics_exporter()
+    if exporter is None:
+        st.caption("Export Prometheus désactivé (`[metrics] enabled = false`).")
+    else:
+        last_export = time.strftime("%H:%M:%S", time.localtime(exporter.last_export)) if exporter.last_export else "jamais"
+        st.caption(f"Export Prometheus : `{exporter.path}` toutes les {exporter.interval}s • Dernier : {last_export}")
+        if exporter.last_error:
+            st.caption(f"Dernière erreur d'export : {exporter.last_error}")
+    col1, col2 = st.columns(2)
+    if exporter is not None and col1.button("Exporter maintenant", key="export_metrics"):
+        exporter.export()
+        st.rerun()
+    if col2.button("Réinitialiser les mesures", key="reset_timings"):
+        spans.reset()
+        st.rerun()
+
+spans.observe("Admin", "rerun", time.perf_counter() - rerun_start)  # Reruns cut short by st.rerun are not counted
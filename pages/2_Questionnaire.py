@@ -6,11 +6,18 @@ Progressive disclosure questionnaire with adaptive profiling
 import sys
 sys.path.insert(0, '..')
 
-import pandas as pd
+import time
+import uuid
 import streamlit as st
-import requests
 from datetime import datetime
 from styles import inject_styles
+from storage import load_table
+from submission_spool import get_spool
+from question_bank import SECTION_ORDER, get_question_bank
+from scoring import (ADAPTIVE_COLUMN, PASS_THRESHOLD, record_answer, section_score, summarize_submission,
+                     summary_table)
+from timing import get_metrics_exporter, spans
+from adaptive import get_item_statistics, next_question, section_estimate, section_outcome
 
 # Page configuration
 st.set_page_config(
@@ -19,9 +26,19 @@ st.set_page_config(
     layout='centered',
     initial_sidebar_state='collapsed'
 )
+rerun_start = time.perf_counter()
+get_metrics_exporter()
+
+# Adaptive mode: stop each section once decided, optionally asking the most informative question first
+questionnaire_settings = st.secrets.get("questionnaire", {})
+ADAPTIVE = questionnaire_settings.get("adaptive", False)
+ITEM_SELECTION = questionnaire_settings.get("item_selection", "difficulty")  # or "order"
+if ADAPTIVE and ITEM_SELECTION == 'difficulty':
+    get_item_statistics("Form3")  # Starts loading them in the background before the first question
 
 # Inject custom styles (hide sidebar)
-inject_styles(hide_sidebar=True)
+with spans.span("Questionnaire", "inject_styles"):
+    inject_styles(hide_sidebar=True)
 
 # Top navigation bar (minimal for questionnaire - just logo)
 st.markdown("""
@@ -78,42 +95,55 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# Constants
-PASS_THRESHOLD = 0.75  # 75% to pass a section
-
-# Load secrets
-DOC_ID = st.secrets["grist"]["doc_id"]
-API_KEY = st.secrets["grist"]["api_key"]
-subdomain = st.secrets["grist"]["subdomain"]
-headers = {"Authorization": f"Bearer {API_KEY}"}
 
+def save_answers(answers_list, summary_rows, submission_id):
+    """Queue answers for Form3 and their summary as one submission; the spool worker writes them.
 
-def load_grist_table(table_name):
-    """Load a table from Grist."""
-    url = f"https://{subdomain}.getgrist.com/api/docs/{DOC_ID}/tables/{table_name}/records"
-    try:
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            data = response.json()
-            if 'records' not in data:
-                return {"records": []}, None
-            return data, None
-        return {"records": []}, f"Erreur {response.status_code}"
-    except Exception as e:
-        return {"records": []}, str(e)
-
-
-def save_answers_to_grist(answers_list):
-    """Save answers to Grist Form3."""
+    The id is the questionnaire's: saving it again never duplicates its rows.
+    """
     try:
-        records = [{"fields": a} for a in answers_list]
-        url = f"https://{subdomain}.getgrist.com/api/docs/{DOC_ID}/tables/Form3/records"
-        response = requests.post(url, headers=headers, json={"records": records})
-        return response.status_code == 200
-    except:
+        # The summary is optional: documents without it still get their answers
+        get_spool().enqueue_tables({"Form3": answers_list, summary_table("Form3"): summary_rows}, submission_id,
+                                   optional=[summary_table("Form3")])
+        return True
+    except OSError:
         return False
 
 
+def complete_section(profile, section, score_pct):
+    """Store a section score, then move to the next section, or to the next profile on failure."""
+    st.session_state.profile_results[profile][section] = score_pct
+    section_idx = SECTION_ORDER.index(section)
+
+    if score_pct >= PASS_THRESHOLD and section_idx < len(SECTION_ORDER) - 1:
+        # Move to next section
+        st.session_state.current_section = SECTION_ORDER[section_idx + 1]
+    else:
+        # Completed all sections for this profile, or failed: move to next profile
+        st.session_state.profile_results[profile]['passed'] = score_pct >= PASS_THRESHOLD
+        st.session_state.current_profile_idx += 1
+        st.session_state.current_section = 'screening'
+
+
+def answer_question(profile, section, question, questions, key):
+    """Adaptive mode form callback: record the answer and close the section once it is decided."""
+    answer = st.session_state.get(key)
+    if answer is None:
+        st.session_state.answer_missing = True
+        return
+    score = question.scores[question.answers.index(answer)]
+    st.session_state.answers[question.text] = {
+        'reponse': answer,
+        'score': score,
+        'profile': profile,
+        'section': section
+    }
+    record_answer(st.session_state.section_totals, profile, section, question.text, score)
+    answered = st.session_state.section_totals[(profile, section)]['scores']
+    if section_outcome(questions, answered) is not None:
+        complete_section(profile, section, section_estimate(questions, answered))
+
+
 def generate_results_markdown(user_info, profile_results, selected_profiles):
     """Generate a colorful markdown file with results."""
     qualified = [p for p, r in profile_results.items() if r.get('passed', False)]
@@ -206,26 +236,6 @@ Le seuil de qualification est de **75%** par section. Pour être qualifié sur u
     return md
 
 
-def calculate_section_score(answers, questions_df, profile, section_type):
-    """Calculate score percentage for a section."""
-    section_questions = questions_df[
-        (questions_df['profile_type'] == profile) &
-        (questions_df['question_type'] == section_type)
-    ]['question'].unique()
-
-    if len(section_questions) == 0:
-        return 1.0  # No questions = auto-pass
-
-    total_score = 0
-    max_score = len(section_questions) * 4  # Max 4 points per question
-
-    for q in section_questions:
-        if q in answers:
-            total_score += answers[q]['score']
-
-    return total_score / max_score if max_score > 0 else 0
-
-
 # Initialize session state
 defaults = {
     'step': 'welcome',
@@ -234,15 +244,20 @@ defaults = {
     'current_profile_idx': 0,
     'current_section': 'screening',
     'answers': {},
+    'section_totals': {},  # {(profile, section): {'total': int, 'scores': {question: score}}}
     'profile_results': {},  # {profile: {'screening': score, 'expertise': score, 'mastery': score, 'passed': bool}}
-    'submitted': False
+    'submitted': False,
+    'submission_id': None,  # Idempotency key of this questionnaire's rows
+    'reruns': 0  # Script runs since the questionnaire was (re)started
 }
 for key, value in defaults.items():
     if key not in st.session_state:
         st.session_state[key] = value
+st.session_state.reruns += 1
 
 # Load questions
-data2, error = load_grist_table("Form2")
+with spans.span("Questionnaire", "table Form2"):
+    data2, error = load_table("Form2")
 if error:
     st.error(f"Impossible de charger le questionnaire: {error}")
     st.stop()
@@ -252,12 +267,13 @@ if not records:
     st.warning("Aucune question disponible.")
     st.stop()
 
-questions_df = pd.json_normalize(records, sep='_')
-questions_df.columns = [col.replace('fields_', '') for col in questions_df.columns]
+# Compiled once per Form2 version and shared by all sessions
+with spans.span("Questionnaire", "question_bank"):
+    question_bank = get_question_bank(data2)
 
 # Get available profiles
-available_profiles = sorted(questions_df['profile_type'].dropna().unique())
-section_order = ['screening', 'expertise', 'mastery']
+available_profiles = list(question_bank.profiles)
+section_order = list(SECTION_ORDER)
 section_labels = {'screening': '🔍 Screening', 'expertise': '💡 Expertise', 'mastery': '🎓 Maîtrise'}
 
 # =============================================================================
@@ -313,6 +329,7 @@ if st.session_state.step == 'welcome':
             st.session_state.current_section = 'screening'
             st.session_state.step = 'questions'
             st.session_state.profile_results = {p: {} for p in selected}
+            st.session_state.submission_id = uuid.uuid4().hex
             st.rerun()
 
     if not can_proceed:
@@ -334,11 +351,7 @@ elif st.session_state.step == 'questions':
     current_profile = profiles[current_idx]
 
     # Get questions for current profile and section
-    section_df = questions_df[
-        (questions_df['profile_type'] == current_profile) &
-        (questions_df['question_type'] == current_section)
-    ]
-    unique_questions = section_df['question'].unique()
+    unique_questions = question_bank.questions(current_profile, current_section)
 
     # If no questions for this section, skip to next
     if len(unique_questions) == 0:
@@ -376,76 +389,76 @@ elif st.session_state.step == 'questions':
 
     st.divider()
 
-    # Display questions
+    # Display questions in a form: answering does not rerun the page, only
+    # "Valider cette section" does, with every answer of the section at once
     all_answered = True
     section_key = f"{current_profile}_{current_section}"
-
-    for i, question in enumerate(unique_questions):
-        st.markdown(f"**Question {i+1}/{len(unique_questions)}**")
-        st.markdown(f"*{question}*")
-
-        # Get possible answers sorted by score (highest first)
-        q_data = section_df[section_df['question'] == question].sort_values('score', ascending=False)
-        possible_answers = q_data['reponse'].tolist()
-        scores = q_data['score'].tolist()
-
-        # Get current answer if any
-        current_answer = st.session_state.answers.get(question, {}).get('reponse', None)
-        default_idx = possible_answers.index(current_answer) if current_answer in possible_answers else None
-
-        selected_answer = st.radio(
-            f"q_{section_key}_{i}",
-            possible_answers,
-            index=default_idx,
-            label_visibility="collapsed",
-            key=f"radio_{section_key}_{i}"
-        )
-
-        if selected_answer:
-            score_idx = possible_answers.index(selected_answer)
-            st.session_state.answers[question] = {
-                'reponse': selected_answer,
-                'score': scores[score_idx],
-                'profile': current_profile,
-                'section': current_section
-            }
-        else:
-            all_answered = False
-
-        st.divider()
-
-    # Navigation
-    col1, col2, col3 = st.columns([1, 1, 1])
-
-    with col3:
-        if st.button("Valider cette section →", type="primary", disabled=not all_answered):
-            # Calculate score for this section
-            score_pct = calculate_section_score(
-                st.session_state.answers, questions_df, current_profile, current_section
+    section_form = st.form(f"section_{section_key}", border=False)
+
+    render_start = time.perf_counter()
+    if ADAPTIVE:
+        # One question per submit: the form callback records it and closes
+        # the section as soon as its outcome can no longer change
+        answered = st.session_state.section_totals.get((current_profile, current_section), {}).get('scores', {})
+        statistics = get_item_statistics("Form3") if ITEM_SELECTION == 'difficulty' else None
+        question = next_question(unique_questions, answered, current_profile, statistics)
+        answer_key = f"radio_{section_key}_{unique_questions.index(question)}"
+        section_form.markdown(f"**Question {len(answered) + 1}** (au plus {len(unique_questions)})")
+        section_form.markdown(f"*{question.text}*")
+        section_form.radio(f"q_{answer_key}", list(question.answers), index=None,
+                           label_visibility="collapsed", key=answer_key)
+        section_form.form_submit_button("Valider cette réponse →", type="primary", on_click=answer_question,
+                                        args=(current_profile, current_section, question, unique_questions, answer_key))
+        st.caption("Mode adaptatif : la section s'arrête dès que son résultat est acquis.")
+        if st.session_state.pop('answer_missing', False):
+            st.warning("Choisissez une réponse pour continuer.")
+        validated = False
+    else:
+        for i, (question, possible_answers, scores) in enumerate(unique_questions):
+            section_form.markdown(f"**Question {i+1}/{len(unique_questions)}**")
+            section_form.markdown(f"*{question}*")
+
+            # Possible answers are pre-sorted by score (highest first)
+            possible_answers = list(possible_answers)
+
+            # Get current answer if any
+            current_answer = st.session_state.answers.get(question, {}).get('reponse', None)
+            default_idx = possible_answers.index(current_answer) if current_answer in possible_answers else None
+
+            selected_answer = section_form.radio(
+                f"q_{section_key}_{i}",
+                possible_answers,
+                index=default_idx,
+                label_visibility="collapsed",
+                key=f"radio_{section_key}_{i}"
             )
-            st.session_state.profile_results[current_profile][current_section] = score_pct
-
-            passed = score_pct >= PASS_THRESHOLD
 
-            if passed:
-                # Move to next section
-                if section_idx < len(section_order) - 1:
-                    st.session_state.current_section = section_order[section_idx + 1]
-                else:
-                    # Completed all sections for this profile
-                    st.session_state.profile_results[current_profile]['passed'] = True
-                    st.session_state.current_profile_idx += 1
-                    st.session_state.current_section = 'screening'
+            if selected_answer:
+                score_idx = possible_answers.index(selected_answer)
+                st.session_state.answers[question] = {
+                    'reponse': selected_answer,
+                    'score': scores[score_idx],
+                    'profile': current_profile,
+                    'section': current_section
+                }
+                record_answer(st.session_state.section_totals, current_profile,
+                              current_section, question, scores[score_idx])
             else:
-                # Failed - move to next profile
-                st.session_state.profile_results[current_profile]['passed'] = False
-                st.session_state.current_profile_idx += 1
-                st.session_state.current_section = 'screening'
+                all_answered = False
 
-            st.rerun()
+            section_form.divider()
+        validated = section_form.form_submit_button("Valider cette section →", type="primary")
+    spans.observe("Questionnaire", "questions_render", time.perf_counter() - render_start)
 
-    if not all_answered:
+    # Navigation
+    if validated and not all_answered:
         st.warning("Répondez à toutes les questions pour continuer.")
+    elif validated:
+        score_pct = section_score(
+            st.session_state.section_totals, current_profile, current_section, len(unique_questions)
+        )
+        complete_section(current_profile, current_section, score_pct)
+        st.rerun()
 
     # Show current section progress
     with st.expander("📊 Votre progression"):
@@ -531,11 +544,26 @@ elif st.session_state.step == 'results':
                     'question': question,
                     'reponse': data['reponse'],
                     'score': data['score'],
-                    'profile_type': data['profile']
+                    'profile_type': data['profile'],
+                    **({ADAPTIVE_COLUMN: True} if ADAPTIVE else {})
                 })
 
-            if save_answers_to_grist(final_answers):
+            with spans.span("Questionnaire", "summarize_submission"):
+                summary_rows = summarize_submission(
+                    st.session_state.user_info,
+                    st.session_state.answers,
+                    st.session_state.profile_results,
+                    adaptive=ADAPTIVE
+                )
+
+            if st.session_state.submission_id is None:
+                st.session_state.submission_id = uuid.uuid4().hex
+            with spans.span("Questionnaire", "spool_enqueue"):
+                saved = save_answers(final_answers, summary_rows, st.session_state.submission_id)
+            if saved:
                 st.session_state.submitted = True
+                st.session_state.step = 'submitted'
+                spans.observe_reruns(st.session_state.reruns)
                 st.rerun()
             else:
                 st.error("Erreur lors de l'enregistrement. Veuillez réessayer.")
@@ -543,7 +571,7 @@ elif st.session_state.step == 'results':
 # =============================================================================
 # SUBMITTED
 # =============================================================================
-elif st.session_state.submitted:
+elif st.session_state.step == 'submitted':
     st.balloons()
     st.title("🎉 Merci !")
 
@@ -566,11 +594,12 @@ elif st.session_state.submitted:
     # Generate and offer markdown download
     st.subheader("📥 Télécharger vos résultats")
 
-    results_md = generate_results_markdown(
-        st.session_state.user_info,
-        st.session_state.profile_results,
-        st.session_state.selected_profiles
-    )
+    with spans.span("Questionnaire", "results_markdown"):
+        results_md = generate_results_markdown(
+            st.session_state.user_info,
+            st.session_state.profile_results,
+            st.session_state.selected_profiles
+        )
 
     filename = f"resultats_{st.session_state.user_info['nom']}_{st.session_state.user_info['prenom']}.md"
     filename = filename.replace(" ", "_").lower()
@@ -591,3 +620,5 @@ elif st.session_state.submitted:
         for key in defaults:
             st.session_state[key] = defaults[key]
         st.rerun()
+
+spans.observe("Questionnaire", "rerun", time.perf_counter() - rerun_start)  # Reruns cut short by st.rerun are not counted
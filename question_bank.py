@@ -0,0 +1,109 @@
+"""
+Question Bank - La Forge à Data Position
+Immutable questionnaire index compiled once from Form2 and shared by all sessions
+"""
+
+import sys
+import threading
+from types import MappingProxyType
+from typing import NamedTuple
+
+SECTION_ORDER = ('screening', 'expertise', 'mastery')
+FORM2_COLUMNS = ('profile_type', 'question', 'reponse', 'score', 'question_type', 'position')
+
+
+class Question(NamedTuple):
+    """A question with its answers sorted by score (highest first)."""
+    text: str
+    answers: tuple
+    scores: tuple
+
+
+class QuestionBank(NamedTuple):
+    """Questions indexed by (profile, section), in display order."""
+    profiles: tuple
+    sections: MappingProxyType
+
+    def questions(self, profile, section):
+        """Questions of a section, or an empty tuple when it has none."""
+        return self.sections.get((profile, section), ())
+
+
+def to_number(value):
+    """Convert a numeric CSV cell to int/float (None when empty)."""
+    if value is None or value == '':
+        return None
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def form2_fields(row):
+    """Map a core_data CSV row to Form2 fields with typed score and position."""
+    fields = {col: row.get(col) or None for col in FORM2_COLUMNS}
+    fields['score'] = to_number(fields['score'])
+    fields['position'] = to_number(fields['position'])
+    return fields
+
+
+def _intern(value):
+    # Texts repeated across profiles and sections are stored once
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _score_key(score):
+    # Highest score first, missing scores last
+    return (score is None, -(score or 0))
+
+
+def compile_question_bank(records):
+    """Compile Form2 records into a QuestionBank in a single pass."""
+    grouped = {}
+    profiles = set()
+    for record in records:
+        fields = record.get('fields', {})
+        profile = fields.get('profile_type')
+        if profile is None:
+            continue
+        profiles.add(profile)
+        section = grouped.setdefault((profile, fields.get('question_type')), {})
+        # dict keeps questions in order of first appearance
+        section.setdefault(fields.get('question'), []).append(
+            (fields.get('reponse'), fields.get('score'))
+        )
+
+    sections = {}
+    for key, questions in grouped.items():
+        compiled = []
+        for text, answers in questions.items():
+            answers = sorted(answers, key=lambda a: _score_key(a[1]))
+            compiled.append(Question(
+                _intern(text),
+                tuple(_intern(a[0]) for a in answers),
+                tuple(a[1] for a in answers),
+            ))
+        sections[key] = tuple(compiled)
+
+    return QuestionBank(tuple(_intern(p) for p in sorted(profiles)), MappingProxyType(sections))
+
+
+_lock = threading.Lock()
+_compiled = (None, None)  # (Form2 payload, QuestionBank)
+
+
+def get_question_bank(data2):
+    """Shared QuestionBank for a Form2 payload, recompiled only when it changes.
+
+    The table cache hands out the same payload object until Form2's content
+    changes, so identity is enough to detect a new version.
+    """
+    global _compiled
+    with _lock:
+        source, bank = _compiled
+        if source is not data2:
+            bank = compile_question_bank(data2.get('records', []))
+            _compiled = (data2, bank)
+        return bank
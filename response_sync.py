@@ -0,0 +1,120 @@
+"""
+Response Sync - La Forge à Data Position
+Incremental (delta) synchronisation of the Form3 responses table
+"""
+
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+
+from snapshot_store import DEFAULT_SNAPSHOT_DIR, SnapshotStore
+from storage import get_backend
+
+# =============================================================================
+# DEFAULTS
+# =============================================================================
+DELTA_FIRST_PAGE = 8          # Newest rows requested first by a delta sync, doubled while all are new
+DELTA_PAGE_SIZE = 500         # Most rows a delta sync requests before falling back to a full sync
+MIN_SYNC_INTERVAL = 5         # Seconds between two delta syncs
+FULL_RESYNC_INTERVAL = 600    # Seconds between full resyncs (catch edits/deletions)
+
+
+def records_to_frame(records):
+    """Flatten Grist records into a DataFrame with plain column names."""
+    frame = pd.json_normalize(records, sep='_')
+    frame.columns = [col.replace('fields_', '') for col in frame.columns]
+    return frame
+
+
+class ResponseSync:
+    """Local snapshot of a responses table, refreshed with deltas.
+
+    Grist's ``filter`` parameter only supports equality, so new rows are
+    read newest-first with ``sort=-id`` and ``limit``: only rows above the
+    highest id already seen are normalized and appended to the snapshot.
+    The limit starts small and doubles while every row returned is new,
+    so a refresh with nothing new costs a handful of rows. A full download
+    happens when the snapshot is empty, when more than ``page_size`` rows
+    arrived, and every ``full_resync_interval`` seconds to
+    pick up edits and deletions. The snapshot survives restarts, so a new
+    process resumes with a delta sync.
+    """
+
+    def __init__(self, backend, table_id, store, page_size=DELTA_PAGE_SIZE,
+                 first_page=DELTA_FIRST_PAGE, min_interval=MIN_SYNC_INTERVAL,
+                 full_resync_interval=FULL_RESYNC_INTERVAL):
+        self.backend = backend
+        self.table_id = table_id
+        self.store = store
+        self.page_size = page_size
+        self.first_page = min(first_page, page_size)
+        self.min_interval = min_interval
+        self.full_resync_interval = full_resync_interval
+
+        self.last_id = store.last_id
+        self.last_sync = 0.0
+        self.stats = {"full_syncs": 0, "delta_syncs": 0, "delta_requests": 0, "rows_appended": 0}
+        self._lock = threading.Lock()
+
+    def refresh(self, full=False):
+        """Bring the snapshot up to date. Returns ``(store, error)``."""
+        with self._lock:
+            now = time.monotonic()
+            if not full and self.last_sync and now - self.last_sync < self.min_interval:
+                return self.store, None
+
+            needs_full = (
+                full
+                or not self.store.last_full_sync
+                or time.time() - self.store.last_full_sync >= self.full_resync_interval
+            )
+            error = self._full_sync() if needs_full else self._delta_sync()
+            if error is None:
+                self.last_sync = time.monotonic()
+            return self.store, error
+
+    def _full_sync(self):
+        data, error = self.backend.list_records(self.table_id)
+        if error:
+            return error
+        records = data.get('records', [])
+        self.last_id = max((r['id'] for r in records), default=0)
+        self.store.replace(records_to_frame(records) if records else pd.DataFrame(), self.last_id)
+        self.stats["full_syncs"] += 1
+        return None
+
+    def _delta_sync(self):
+        limit = self.first_page
+        while True:
+            data, error = self.backend.list_records(self.table_id, sort="-id", limit=limit)
+            self.stats["delta_requests"] += 1
+            if error:
+                return error
+            records = data.get('records', [])
+            new_records = [r for r in records if r['id'] > self.last_id]
+            if len(new_records) < limit:
+                break  # The page reaches rows already synced
+            if limit >= self.page_size:
+                # More new rows than the largest page: the gap cannot be fetched by id
+                return self._full_sync()
+            limit = min(2 * limit, self.page_size)
+
+        self.stats["delta_syncs"] += 1
+        if new_records:
+            new_records.reverse()  # Keep the snapshot in ascending id order
+            self.last_id = new_records[-1]['id']
+            self.store.append(records_to_frame(new_records), self.last_id)
+            self.stats["rows_appended"] += len(new_records)
+        return None
+
+
+@st.cache_resource
+def get_response_sync(table_id):
+    """Process-wide synchronised copy of ``table_id``, shared by admin sessions.
+
+    Snapshots are kept under the ``[snapshots] path`` secrets setting.
+    """
+    directory = st.secrets.get("snapshots", {}).get("path", DEFAULT_SNAPSHOT_DIR)
+    return ResponseSync(get_backend(), table_id, SnapshotStore(directory, table_id))
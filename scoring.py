@@ -0,0 +1,195 @@
+"""
+Scoring - La Forge à Data Position
+Running section totals for a live questionnaire and vectorized bulk re-scoring of Form3
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from question_bank import SECTION_ORDER
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+PASS_THRESHOLD = 0.75         # 75% to pass a section
+MAX_SCORE_PER_QUESTION = 4
+PARTICIPANT_COLUMNS = ['nom', 'prenom', 'mail']
+ADAPTIVE_COLUMN = 'adaptive'  # Set on rows of adaptive questionnaires, which skip questions
+
+
+# =============================================================================
+# IN-SESSION TALLIES
+# =============================================================================
+def record_answer(section_totals, profile, section, question, score):
+    """Update the running total of a section when a radio answer changes."""
+    tally = section_totals.setdefault((profile, section), {'total': 0, 'scores': {}})
+    previous = tally['scores'].get(question, 0)
+    tally['scores'][question] = score
+    tally['total'] += (score or 0) - (previous or 0)
+
+
+def section_score(section_totals, profile, section, n_questions):
+    """Score percentage of a section from its running total."""
+    if n_questions == 0:
+        return 1.0  # No questions = auto-pass
+    tally = section_totals.get((profile, section))
+    total = tally['total'] if tally else 0
+    return total / (n_questions * MAX_SCORE_PER_QUESTION)
+
+
+# =============================================================================
+# BULK RE-SCORING
+# =============================================================================
+def adaptive_rows(form_data):
+    """Mask of the answers given in adaptive mode.
+
+    Their unasked questions are not missing answers: the section outcome
+    was decided when they stopped, and is kept in the summary table.
+    """
+    if ADAPTIVE_COLUMN not in form_data.columns:
+        return np.zeros(len(form_data), dtype=bool)
+    return form_data[ADAPTIVE_COLUMN].astype(object).isin([True, 'True', 'true']).to_numpy()
+
+
+def rescore_responses(form_data, question_bank, threshold=PASS_THRESHOLD):
+    """Re-score every participant × profile × section against the current bank.
+
+    Answers are looked up in ``question_bank`` (so score changes in Form2 are
+    applied retroactively), encoded as a participants × questions matrix and
+    reduced to section totals with a single matrix product. Returns one row
+    per participant and evaluated profile with the section percentages and
+    the ``passed`` flag (all sections at or above ``threshold``). Adaptive
+    answers are left out: see ``adaptive_rows``.
+    """
+    form_data = form_data[~adaptive_rows(form_data)]
+    keys = [c for c in PARTICIPANT_COLUMNS if c in form_data.columns]
+    columns = keys + ['profile_type'] + list(SECTION_ORDER) + ['passed']
+
+    # Column space: every question of the bank, grouped by (profile, section)
+    sections = [(p, s) for p in question_bank.profiles for s in SECTION_ORDER]
+    question_cols, answer_keys, answer_scores, memberships = {}, [], [], []
+    seen_answers = set()
+    for j, (profile, section) in enumerate(sections):
+        for q in question_bank.questions(profile, section):
+            # A question listed in several sections counts in each of them
+            col = question_cols.setdefault((profile, q.text), len(question_cols))
+            memberships.append((col, j))
+            for answer, score in zip(q.answers, q.scores):
+                if (profile, q.text, answer) not in seen_answers:
+                    seen_answers.add((profile, q.text, answer))
+                    answer_keys.append((profile, q.text, answer))
+                    answer_scores.append(score or 0)
+    question_keys = list(question_cols)
+    if form_data.empty or not question_keys:
+        return pd.DataFrame(columns=columns)
+
+    question_index = pd.MultiIndex.from_tuples(question_keys)
+    answer_index = pd.MultiIndex.from_tuples(answer_keys)
+    answer_scores = np.asarray(answer_scores, dtype=np.float64)
+
+    # Encode rows: participant code, question column, current answer score
+    participants = form_data[keys].astype(object).fillna('').astype(str)
+    codes, uniques = pd.MultiIndex.from_frame(participants).factorize()
+    q_cols = question_index.get_indexer(
+        pd.MultiIndex.from_arrays([form_data['profile_type'], form_data['question']])
+    )
+    a_idx = answer_index.get_indexer(
+        pd.MultiIndex.from_arrays([form_data['profile_type'], form_data['question'], form_data['reponse']])
+    )
+    known = q_cols >= 0
+    codes, q_cols, a_idx = codes[known], q_cols[known], a_idx[known]
+    row_scores = np.where(a_idx >= 0, answer_scores[np.maximum(a_idx, 0)], 0.0)
+
+    n_participants, n_questions = len(uniques), len(question_index)
+    answers = np.zeros((n_participants, n_questions), dtype=np.float64)
+    answers[codes, q_cols] = row_scores
+
+    # questions × sections membership, then one product for all totals
+    membership = np.zeros((n_questions, len(sections)), dtype=np.float64)
+    rows, cols = zip(*memberships)
+    membership[list(rows), list(cols)] = 1.0
+    counts = membership.sum(axis=0)
+    totals = answers @ membership
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = np.where(counts > 0, totals / (counts * MAX_SCORE_PER_QUESTION), 1.0)
+
+    n_sections = len(SECTION_ORDER)
+    pct = pct.reshape(n_participants, len(question_bank.profiles), n_sections)
+    passed = (pct >= threshold).all(axis=2)
+
+    # Only report profiles a participant actually answered
+    profile_of_question = membership.argmax(axis=1) // n_sections
+    evaluated = np.zeros((n_participants, len(question_bank.profiles)), dtype=bool)
+    evaluated[codes, profile_of_question[q_cols]] = True
+    p_idx, prof_idx = np.nonzero(evaluated)
+
+    result = uniques[p_idx].to_frame(index=False, name=keys)
+    result['profile_type'] = np.asarray(question_bank.profiles, dtype=object)[prof_idx]
+    for k, section in enumerate(SECTION_ORDER):
+        result[section] = pct[p_idx, prof_idx, k]
+    result['passed'] = passed[p_idx, prof_idx]
+    return result[columns]
+
+
+# =============================================================================
+# MATERIALIZED SUMMARY
+# =============================================================================
+def summary_table(table_id):
+    """Name of the per-participant summary table kept next to a responses table."""
+    return f"{table_id}_summary"
+
+
+def summarize_submission(user_info, answers, profile_results, adaptive=False):
+    """Summary rows (one per evaluated profile) for a questionnaire being submitted."""
+    rows = []
+    for profile, results in profile_results.items():
+        scores = [a['score'] or 0 for a in answers.values() if a['profile'] == profile]
+        row = {
+            'nom': user_info['nom'],
+            'prenom': user_info['prenom'],
+            'mail': user_info['mail'],
+            'profile_type': profile,
+            'mean_score': sum(scores) / len(scores) if scores else None,
+            'answer_count': len(scores),
+            'passed': bool(results.get('passed', False)),
+        }
+        for section in SECTION_ORDER:
+            row[section] = results.get(section)
+        if adaptive:
+            row[ADAPTIVE_COLUMN] = True
+        rows.append(row)
+    return rows
+
+
+def backfill_id(rows):
+    """Submission id of backfilled summary rows, derived from the respondents they cover.
+
+    Backfilling the same respondents again (a double click before the
+    summary snapshot caught up) reuses the id, so the spool writes them once.
+    """
+    by = [c for c in PARTICIPANT_COLUMNS + ['profile_type'] if c in rows.columns]
+    keys = sorted(rows[by].astype(str).agg('\x1f'.join, axis=1))
+    return "backfill-" + hashlib.sha256('\n'.join(keys).encode('utf-8')).hexdigest()[:32]
+
+
+def summarize_responses(form_data, question_bank, threshold=PASS_THRESHOLD):
+    """Summary rows rebuilt from raw responses (to backfill older submissions).
+
+    Adaptive submissions are skipped: their summary rows are written with
+    the answers and cannot be rebuilt from them.
+    """
+    form_data = form_data[~adaptive_rows(form_data)]
+    keys = [c for c in PARTICIPANT_COLUMNS if c in form_data.columns]
+    by = keys + ['profile_type']
+    participants = form_data[by].astype(object).fillna('').astype(str)
+    scores = pd.to_numeric(form_data['score'], errors='coerce').fillna(0)
+    means = scores.groupby([participants[c] for c in by]).agg(['mean', 'count'])
+    means.columns = ['mean_score', 'answer_count']
+
+    sections = rescore_responses(form_data, question_bank, threshold)
+    sections[keys] = sections[keys].fillna('').astype(str)
+    summary = means.reset_index().merge(sections, on=by, how='left')
+    summary['passed'] = summary['passed'].fillna(False).astype(bool)
+    return summary
@@ -0,0 +1,130 @@
+"""
+Skill Search - La Forge à Data Position
+Nearest-neighbour and gap-filling queries over participants' profile vectors
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from teams import skill_matrix
+
+QUERY_CHUNK = 256     # Query rows scored at once (bounds the chunk × participants matrix)
+MAX_CANDIDATES = 50   # Participants offered by a name search (bounds what a widget sends to the browser)
+
+
+class SkillIndex:
+    """Participants × profiles score matrix prepared for batched queries.
+
+    Unit vectors (for cosine) and squared norms (for Euclidean distance)
+    are computed once, so a query is one matrix product plus a partial
+    sort, whatever the number of participants.
+    """
+
+    def __init__(self, participants, profiles, skills):
+        self.participants = participants
+        self.profiles = list(profiles)
+        # Profiles a participant was not evaluated on are NaN in ``skills`` and score 0
+        self.evaluated = ~np.isnan(skills)
+        self.skills = np.ascontiguousarray(np.nan_to_num(skills), dtype=np.float64)
+        norms = np.linalg.norm(self.skills, axis=1)
+        self.unit = self.skills / np.where(norms > 0, norms, 1.0)[:, None]
+        self.squared_norms = norms ** 2
+        self.labels = (participants['prenom'] + ' ' + participants['nom']).tolist() \
+            if {'nom', 'prenom'} <= set(participants.columns) else [str(i) for i in range(len(skills))]
+        self._folded_labels = pd.Series(self.labels, dtype=object).str.casefold()
+
+    def __len__(self):
+        return len(self.skills)
+
+    def similar(self, rows, k=5, metric='cosine'):
+        """Top-``k`` neighbours of every participant in ``rows`` (itself excluded).
+
+        Returns ``(indices, scores)`` arrays of shape ``(len(rows), k)``:
+        cosine similarity (highest first) or Euclidean distance (lowest first).
+        """
+        rows = np.atleast_1d(np.asarray(rows, dtype=int))
+        k = max(0, min(k, len(self) - 1))
+        indices = np.empty((len(rows), k), dtype=int)
+        scores = np.empty((len(rows), k))
+        for start in range(0, len(rows), QUERY_CHUNK):
+            chunk = rows[start:start + QUERY_CHUNK]
+            if metric == 'cosine':
+                # Negated so that smaller is better for both metrics
+                cost = -(self.unit[chunk] @ self.unit.T)
+            else:
+                cost = self.squared_norms[chunk, None] + self.squared_norms[None, :] \
+                    - 2 * (self.skills[chunk] @ self.skills.T)
+            cost[np.arange(len(chunk)), chunk] = np.inf
+            idx, values = _top_k(cost, k)
+            indices[start:start + len(chunk)] = idx
+            scores[start:start + len(chunk)] = -values if metric == 'cosine' else np.sqrt(np.maximum(values, 0))
+        return indices, scores
+
+    def fill_gap(self, needs, k=5, exclude=()):
+        """Participants who best meet ``needs`` (``{profile: target score}``).
+
+        A participant is credited with their score on each needed profile,
+        capped at its target, so one very strong profile cannot hide the
+        others. Returns ``(indices, fill ratios)``, best first.
+        """
+        target = np.zeros(len(self.profiles))
+        for profile, level in needs.items():
+            if profile in self.profiles:
+                target[self.profiles.index(profile)] = level
+        if not target.any():
+            return np.empty(0, dtype=int), np.empty(0)
+
+        fill = np.minimum(self.skills, target).sum(axis=1) / target.sum()
+        # Tie-break on the remaining profiles
+        cost = -(fill + 1e-6 * self.skills.sum(axis=1))
+        cost[list(exclude)] = np.inf
+        k = max(0, min(k, len(self) - len(set(exclude))))
+        idx, _ = _top_k(cost[None, :], k)
+        return idx[0], fill[idx[0]]
+
+    def search(self, text, limit=MAX_CANDIDATES):
+        """Participants whose label contains ``text`` (case-insensitive), in index order.
+
+        Returns ``(indices, matches)``: at most ``limit`` indices, so a
+        widget built on them stays small, and the total number of matches.
+        """
+        text = (text or '').strip().casefold()
+        mask = self._folded_labels.str.contains(text, regex=False).to_numpy() if text \
+            else np.ones(len(self), dtype=bool)
+        indices = np.flatnonzero(mask)
+        return indices[:limit], len(indices)
+
+    def frame(self, indices, scores, column):
+        """Results as a DataFrame of participant labels, profile scores and ``column``."""
+        result = pd.DataFrame(self.skills[indices], columns=self.profiles)
+        result.insert(0, 'Participant', [self.labels[i] for i in indices])
+        result[column] = scores
+        return result
+
+
+def _top_k(cost, k):
+    """Indices and values of the ``k`` smallest entries of each row, sorted."""
+    if k == 0:
+        return np.empty((len(cost), 0), dtype=int), np.empty((len(cost), 0))
+    part = np.argpartition(cost, k - 1, axis=1)[:, :k]
+    values = np.take_along_axis(cost, part, axis=1)
+    order = np.argsort(values, axis=1, kind='stable')
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+
+_lock = threading.Lock()
+_indexes = {}  # (snapshot directory, score column, profiles) -> (snapshot version, SkillIndex)
+
+
+def get_skill_index(store, score_column='score', profiles=None):
+    """Shared SkillIndex of a snapshot, rebuilt only when the snapshot changes."""
+    key = (str(store.directory), score_column, tuple(profiles) if profiles else None)
+    with _lock:
+        version, index = _indexes.get(key, (None, None))
+        if version != store.version:
+            frame = store.query(where={'profile_type': list(profiles)} if profiles else None)
+            index = SkillIndex(*skill_matrix(frame, score_column, fill_value=np.nan))
+            _indexes[key] = (store.version, index)
+        return index
@@ -0,0 +1,186 @@
+"""
+Snapshot Store - La Forge à Data Position
+Columnar on-disk copy of synced tables, memory-mapped on read
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# =============================================================================
+# DEFAULTS
+# =============================================================================
+DEFAULT_SNAPSHOT_DIR = "snapshots"
+MAX_SEGMENTS = 16            # Delta segments kept before they are compacted into one
+
+
+def frame_to_arrow(frame):
+    """Convert a DataFrame to an Arrow table with dictionary-encoded text columns.
+
+    Names, profiles and answers repeat on every row, so storing each distinct
+    string once keeps both the files and the loaded frames small.
+    """
+    columns = {}
+    for name in frame.columns:
+        values = frame[name]
+        try:
+            array = pa.array(values, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Mixed types in one column (e.g. numbers and text): keep them as text
+            array = pa.array(values.astype(object).where(values.isna(), values.astype(str)), from_pandas=True)
+        if pa.types.is_string(array.type) or pa.types.is_large_string(array.type):
+            array = array.dictionary_encode()
+        columns[str(name)] = array
+    return pa.table(columns)
+
+
+class SnapshotStore:
+    """Arrow IPC segments of one table, with a manifest of what they contain.
+
+    A full sync replaces every segment, a delta sync appends a new one.
+    Segments are written to a temporary file and renamed, and the manifest
+    is only updated once they are complete, so a crash never exposes a
+    partial snapshot. Reads memory-map the segments: columns are paged in
+    by the OS when accessed instead of being copied into the process.
+    """
+
+    def __init__(self, directory, table_id, max_segments=MAX_SEGMENTS):
+        self.directory = Path(directory) / table_id
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.table_id = table_id
+        self.max_segments = max_segments
+
+        self._lock = threading.Lock()
+        self._manifest = self._read_manifest()
+        self._table = None  # Memory-mapped table for the current manifest
+
+    # -------------------------------------------------------------------------
+    # Manifest
+    # -------------------------------------------------------------------------
+    def _read_manifest(self):
+        try:
+            with open(self.directory / "manifest.json", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {"segments": [], "last_id": 0, "last_full_sync": 0.0, "rows": 0, "sequence": 0}
+        # Ignore a manifest whose segments were removed by hand
+        if not all((self.directory / name).exists() for name in manifest["segments"]):
+            return {"segments": [], "last_id": 0, "last_full_sync": 0.0, "rows": 0,
+                    "sequence": manifest.get("sequence", 0)}
+        return manifest
+
+    def _write_manifest(self, manifest):
+        path = self.directory / "manifest.json"
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, path)
+
+        # Drop segments that are no longer referenced
+        referenced = set(manifest["segments"])
+        for segment in self.directory.glob("*.arrow"):
+            if segment.name not in referenced:
+                segment.unlink(missing_ok=True)
+        self._manifest = manifest
+        self._table = None
+
+    @property
+    def last_id(self):
+        return self._manifest["last_id"]
+
+    @property
+    def last_full_sync(self):
+        """Wall-clock time of the last full sync (0 when never synced)."""
+        return self._manifest["last_full_sync"]
+
+    @property
+    def num_rows(self):
+        return self._manifest["rows"]
+
+    @property
+    def version(self):
+        """Bumped by every write, to key values derived from the snapshot."""
+        return self._manifest["sequence"]
+
+    # -------------------------------------------------------------------------
+    # Writes
+    # -------------------------------------------------------------------------
+    def _write_segment(self, table):
+        sequence = self._manifest["sequence"] + 1
+        name = f"{sequence:08d}.arrow"
+        tmp = self.directory / f"{name}.tmp"
+        with pa.OSFile(str(tmp), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, self.directory / name)
+        return name, sequence
+
+    def replace(self, frame, last_id):
+        """Replace the snapshot with the result of a full sync."""
+        with self._lock:
+            name, sequence = self._write_segment(frame_to_arrow(frame))
+            self._write_manifest({
+                "segments": [name], "last_id": last_id, "last_full_sync": time.time(),
+                "rows": len(frame), "sequence": sequence,
+            })
+
+    def append(self, frame, last_id):
+        """Append the rows of a delta sync as a new segment."""
+        with self._lock:
+            name, sequence = self._write_segment(frame_to_arrow(frame))
+            manifest = dict(self._manifest)
+            manifest.update({
+                "segments": manifest["segments"] + [name], "last_id": last_id,
+                "rows": manifest["rows"] + len(frame), "sequence": sequence,
+            })
+            self._write_manifest(manifest)
+            if len(manifest["segments"]) > self.max_segments:
+                self._compact()
+
+    def _compact(self):
+        table = self._load().unify_dictionaries().combine_chunks()
+        name, sequence = self._write_segment(table)
+        self._write_manifest({**self._manifest, "segments": [name], "sequence": sequence})
+
+    # -------------------------------------------------------------------------
+    # Reads
+    # -------------------------------------------------------------------------
+    def _load(self):
+        if self._table is None:
+            tables = [
+                pa.ipc.open_file(pa.memory_map(str(self.directory / name))).read_all()
+                for name in self._manifest["segments"]
+            ]
+            # Later segments may carry columns added since the first sync
+            self._table = pa.concat_tables(tables, promote_options="permissive") if tables else pa.table({})
+        return self._table
+
+    def table(self):
+        """The whole snapshot as a (memory-mapped) Arrow table."""
+        with self._lock:
+            return self._load()
+
+    def query(self, columns=None, where=None):
+        """Rows as a DataFrame, text columns as categoricals.
+
+        ``columns`` limits the columns materialized; ``where`` maps a column
+        to a value or a list of accepted values. Filtering happens on the
+        Arrow table, before anything is converted to pandas. A filter on a
+        column the snapshot does not have matches nothing.
+        """
+        table = self.table()
+        for column, values in (where or {}).items():
+            if column not in table.column_names:
+                table = table.slice(0, 0)
+                break
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+            table = table.filter(pc.is_in(table[column], value_set=pa.array(list(values))))
+        if columns is not None:
+            table = table.select([c for c in columns if c in table.column_names])
+        return table.to_pandas()
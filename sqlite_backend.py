@@ -0,0 +1,225 @@
+"""
+SQLite Backend - La Forge à Data Position
+Local, network-free storage with the same record format as Grist
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from bank_builder import bank_rows, is_question_bank, read_question_bank
+from storage import TABLE_NOT_FOUND, StorageBackend
+
+CORE_DATA_DIR = Path(__file__).resolve().parent / "core_data"
+DEFAULT_SEED_FILES = ["Questionnaire_atelier.xlsx - Questionnaire global.csv"]
+TABLES = ("Form0", "Form2", "Form3", "Form3_summary", "Form3_teams")
+# Columns filtered on before the first write (like the Grist document's schema)
+TABLE_COLUMNS = {
+    "Form3": ("submission_id",),
+    "Form3_summary": ("submission_id",),
+    "Form3_teams": ("submission_id",),
+}
+_SORT_TOKEN = re.compile(r"^(-?)([\w-]+)$")
+
+
+def _quote(identifier):
+    """Quote a table or column name for SQLite."""
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+class SQLiteBackend(StorageBackend):
+    """One SQLite table per Grist table, columns added on first write.
+
+    Each thread gets its own connection. A per-table version counter is
+    bumped on every write and used as ETag, so the shared table cache can
+    revalidate for free.
+    """
+
+    def __init__(self, path, seed_files=None):
+        super().__init__()
+        self.path = str(path)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._init_schema(seed_files or DEFAULT_SEED_FILES)
+
+    # -------------------------------------------------------------------------
+    # Connection & schema
+    # -------------------------------------------------------------------------
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self, seed_files):
+        conn = self._conn()
+        with self._write_lock, conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS _versions (table_id TEXT PRIMARY KEY, version INTEGER)")
+            for table_id in TABLES:
+                self._ensure_table(conn, table_id)
+                self._ensure_columns(conn, table_id, TABLE_COLUMNS.get(table_id, ()))
+            if not conn.execute("SELECT 1 FROM Form2 LIMIT 1").fetchone():
+                self._seed(conn, seed_files)
+
+    def _ensure_table(self, conn, table_id):
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table_id)} (id INTEGER PRIMARY KEY AUTOINCREMENT)")
+        conn.execute("INSERT OR IGNORE INTO _versions VALUES (?, 0)", (table_id,))
+
+    def _columns(self, conn, table_id):
+        return [row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table_id)})")]
+
+    def _ensure_columns(self, conn, table_id, names):
+        existing = set(self._columns(conn, table_id))
+        for name in names:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {_quote(table_id)} ADD COLUMN {_quote(name)}")
+                existing.add(name)
+
+    def _seed(self, conn, seed_files):
+        """Load the question bank into Form2: CSV exports, or a bank built by ``bank_builder.py``."""
+        records, exports = [], []
+        for name in seed_files:
+            path = Path(name)
+            if not path.is_absolute() and not path.exists():
+                path = CORE_DATA_DIR / name  # Plain export names refer to core_data/
+            if not is_question_bank(path):
+                exports.append(path)
+                continue
+            payload, error = read_question_bank(path)
+            if error:
+                raise OSError(error)
+            records.extend(record["fields"] for record in payload["records"])
+        records.extend(bank_rows(exports))
+        self._insert(conn, "Form2", records)
+
+    def _insert(self, conn, table_id, records):
+        ids = []
+        names = sorted({name for record in records for name in record})
+        self._ensure_columns(conn, table_id, names)
+        for record in records:
+            cols = list(record)
+            if cols:
+                sql = (f"INSERT INTO {_quote(table_id)} ({', '.join(map(_quote, cols))}) "
+                       f"VALUES ({', '.join('?' * len(cols))})")
+                cursor = conn.execute(sql, [record[c] for c in cols])
+            else:
+                cursor = conn.execute(f"INSERT INTO {_quote(table_id)} DEFAULT VALUES")
+            ids.append(cursor.lastrowid)
+        conn.execute("UPDATE _versions SET version = version + 1 WHERE table_id = ?", (table_id,))
+        return ids
+
+    def _update(self, conn, table_id, records):
+        names = sorted({name for record in records for name in record["fields"]})
+        self._ensure_columns(conn, table_id, names)
+        for record in records:
+            cols = list(record["fields"])
+            if cols:
+                sql = (f"UPDATE {_quote(table_id)} SET {', '.join(f'{_quote(c)} = ?' for c in cols)} "
+                       f"WHERE id = ?")
+                conn.execute(sql, [record["fields"][c] for c in cols] + [record["id"]])
+        conn.execute("UPDATE _versions SET version = version + 1 WHERE table_id = ?", (table_id,))
+
+    def _version(self, conn, table_id):
+        row = conn.execute("SELECT version FROM _versions WHERE table_id = ?", (table_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def has_table(self, table_id):
+        """True once the table exists (created at startup or by a first write)."""
+        return self._version(self._conn(), table_id) is not None
+
+    # -------------------------------------------------------------------------
+    # Records API
+    # -------------------------------------------------------------------------
+    def _select(self, conn, table_id, filter=None, sort=None, limit=None):
+        columns = self._columns(conn, table_id)
+        sql = f"SELECT * FROM {_quote(table_id)}"
+        args = []
+        if filter is not None and not (isinstance(filter, dict)
+                                       and all(isinstance(v, list) for v in filter.values())):
+            raise ValueError("Filtre invalide : un objet de listes est attendu")  # As Grist, a 400
+        if filter:
+            clauses = []
+            for col, values in filter.items():
+                if col not in columns:
+                    raise ValueError(f"Colonne de filtre inconnue : {col}")  # Grist answers 400 too
+                if not values:
+                    clauses.append("0")
+                    continue
+                clauses.append(f"{_quote(col)} IN ({', '.join('?' * len(values))})")
+                args.extend(values)
+            sql += " WHERE " + " AND ".join(clauses)
+        order = []
+        for token in (sort or "id").split(","):
+            match = _SORT_TOKEN.match(token.strip())
+            if not match or match.group(2) not in columns:
+                raise ValueError(f"Tri invalide : {token}")
+            order.append(f"{_quote(match.group(2))} {'DESC' if match.group(1) else 'ASC'}")
+        sql += " ORDER BY " + ", ".join(order)
+        if limit:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+
+        records = []
+        for row in conn.execute(sql, args):
+            fields = dict(zip(columns, row))
+            records.append({"id": fields.pop("id"), "fields": fields})
+        return {"records": records}
+
+    def fetch_table(self, table_id, etag=None):
+        start = time.perf_counter()
+        conn = self._conn()
+        try:
+            version = self._version(conn, table_id)
+            if version is None:
+                return None, f"{TABLE_NOT_FOUND} : {table_id}", None
+            new_etag = f'"{table_id}-{version}"'
+            if etag == new_etag:
+                return None, None, etag
+            return self._select(conn, table_id), None, new_etag
+        except (sqlite3.Error, ValueError) as e:
+            return None, str(e), None
+        finally:
+            self._record(f"GET {table_id}", time.perf_counter() - start)
+
+    def list_records(self, table_id, filter=None, sort=None, limit=None):
+        start = time.perf_counter()
+        conn = self._conn()
+        try:
+            if self._version(conn, table_id) is None:
+                return {"records": []}, f"{TABLE_NOT_FOUND} : {table_id}"
+            return self._select(conn, table_id, filter, sort, limit), None
+        except (sqlite3.Error, ValueError, TypeError) as e:
+            return {"records": []}, str(e)
+        finally:
+            self._record(f"GET {table_id}", time.perf_counter() - start)
+
+    def add_records(self, table_id, records):
+        start = time.perf_counter()
+        conn = self._conn()
+        try:
+            with self._write_lock, conn:
+                self._ensure_table(conn, table_id)
+                ids = self._insert(conn, table_id, records)
+            return {"records": [{"id": i} for i in ids]}, None
+        except sqlite3.Error as e:
+            return None, str(e)
+        finally:
+            self._record(f"POST {table_id}", time.perf_counter() - start)
+
+    def update_records(self, table_id, records):
+        start = time.perf_counter()
+        conn = self._conn()
+        try:
+            with self._write_lock, conn:
+                self._ensure_table(conn, table_id)
+                self._update(conn, table_id, records)
+            return {}, None
+        except sqlite3.Error as e:
+            return None, str(e)
+        finally:
+            self._record(f"PATCH {table_id}", time.perf_counter() - start)
@@ -0,0 +1,141 @@
+"""
+Storage Backends - La Forge à Data Position
+Interface shared by the Grist and local SQLite stores used by the pages
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from grist_cache import table_cache, DEFAULT_TTL, DEFAULT_STALE_TTL
+
+LATENCY_WINDOW = 500  # Latencies kept per endpoint for percentiles
+LOADER_WORKERS = 8    # Tables fetched at the same time by submit_tables
+TABLE_NOT_FOUND = "Table introuvable"  # Start of the error every backend returns for a missing table
+
+
+class StorageBackend(ABC):
+    """Operations the pages need on Form0/Form2/Form3.
+
+    Records follow the Grist REST format: ``{"id": 1, "fields": {...}}``.
+    Reads return ``(data, error)`` with ``data = {"records": [...]}``.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._metrics_lock = threading.Lock()
+
+    @abstractmethod
+    def fetch_table(self, table_id, etag=None):
+        """Read a whole table. Returns ``(data, error, etag)``; ``data`` is None when not modified."""
+
+    @abstractmethod
+    def list_records(self, table_id, filter=None, sort=None, limit=None):
+        """Read records, ``filter`` being ``{column: [allowed values]}`` and ``sort`` e.g. ``"-id"``."""
+
+    @abstractmethod
+    def add_records(self, table_id, records):
+        """Add records (list of field dicts). Returns ``(data, error)``."""
+
+    @abstractmethod
+    def update_records(self, table_id, records):
+        """Update records given as ``{"id": ..., "fields": {...}}``. Returns ``(data, error)``."""
+
+    # -------------------------------------------------------------------------
+    # Latency metrics
+    # -------------------------------------------------------------------------
+    def _record(self, endpoint, elapsed, failed=False):
+        with self._metrics_lock:
+            m = self._metrics.setdefault(endpoint, {
+                "calls": 0, "errors": 0, "retries": 0, "total": 0.0, "max": 0.0,
+                "latencies": deque(maxlen=LATENCY_WINDOW),
+            })
+            m["calls"] += 1
+            m["errors"] += int(failed)
+            m["total"] += elapsed
+            m["max"] = max(m["max"], elapsed)
+            m["latencies"].append(elapsed)
+
+    def _record_retry(self, endpoint):
+        with self._metrics_lock:
+            self._metrics[endpoint]["retries"] += 1
+
+    def metrics(self):
+        """Per-endpoint call counts and latencies (milliseconds)."""
+        rows = []
+        with self._metrics_lock:
+            for endpoint, m in sorted(self._metrics.items()):
+                latencies = sorted(m["latencies"])
+                p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+                rows.append({
+                    "endpoint": endpoint,
+                    "calls": m["calls"],
+                    "errors": m["errors"],
+                    "retries": m["retries"],
+                    "mean_ms": 1000 * m["total"] / m["calls"],
+                    "p50_ms": 1000 * latencies[len(latencies) // 2],
+                    "p95_ms": 1000 * p95,
+                    "max_ms": 1000 * m["max"],
+                })
+        return rows
+
+
+@st.cache_resource
+def get_backend():
+    """Process-wide backend selected by the ``[storage]`` secrets section.
+
+    ``backend = "grist"`` (default) uses the ``[grist]`` section;
+    ``backend = "sqlite"`` uses a local database at ``path``, seeded from
+    the ``core_data`` CSV files (or a bank built by ``bank_builder.py``)
+    listed in ``seed_files`` on first use.
+    """
+    storage = st.secrets.get("storage", {})
+    grist = st.secrets.get("grist", {})
+    table_cache.configure(
+        ttl=grist.get("cache_ttl", DEFAULT_TTL),
+        stale_ttl=grist.get("cache_stale_ttl", DEFAULT_STALE_TTL),
+    )
+
+    if storage.get("backend", "grist") == "sqlite":
+        from sqlite_backend import SQLiteBackend
+        return SQLiteBackend(storage.get("path", "forge.db"), seed_files=storage.get("seed_files"))
+
+    from grist_client import GristClient, DEFAULT_TIMEOUT, DEFAULT_RETRIES
+    subdomain = grist.get("subdomain")
+    return GristClient(
+        grist["doc_id"],
+        grist["api_key"],
+        server=None if subdomain else grist["server"],
+        subdomain=subdomain,
+        timeout=_timeout(grist.get("timeout", DEFAULT_TIMEOUT)),
+        retries=grist.get("retries", DEFAULT_RETRIES),
+    )
+
+
+def _timeout(value):
+    """``timeout = 10`` or ``timeout = [3.05, 20]`` (connect, read) from the secrets, as requests expects."""
+    if isinstance(value, (int, float)):
+        return value
+    return tuple(value)
+
+
+def _load(backend, table_name):
+    return table_cache.get(table_name, lambda etag: backend.fetch_table(table_name, etag))
+
+
+def load_table(table_name):
+    """Load a whole table through the shared cache."""
+    return _load(get_backend(), table_name)
+
+
+_loader = ThreadPoolExecutor(max_workers=LOADER_WORKERS, thread_name_prefix="table-loader")
+
+
+def submit_tables(*table_names):
+    """Start loading tables in the background. Returns ``{table_name: future}``."""
+    backend = get_backend()  # Resolved here: workers have no Streamlit context
+    return {name: _loader.submit(_load, backend, name) for name in dict.fromkeys(table_names)}
+
@@ -0,0 +1,201 @@
+"""
+Submission Spool - La Forge à Data Position
+Durable write-behind queue: submissions hit the local disk first, a worker flushes them
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import streamlit as st
+
+from grist_cache import table_cache
+from storage import TABLE_NOT_FOUND, get_backend
+
+# =============================================================================
+# DEFAULTS
+# =============================================================================
+DEFAULT_SPOOL_DIR = "spool"
+CHUNK_SIZE = 500             # Records per POST, below Grist's payload limits
+RETRY_BASE_DELAY = 2         # Seconds, doubled after each failed flush
+RETRY_MAX_DELAY = 300
+IDEMPOTENCY_COLUMN = "submission_id"
+
+logger = logging.getLogger(__name__)
+
+
+class SubmissionSpool:
+    """On-disk queue of submissions flushed to the backend by a background thread.
+
+    A submission is one file, possibly spanning several tables, and every
+    record carries its ``submission_id``. Before a flush, the rows already
+    stored under that id in each table are counted and skipped: chunks are
+    posted in order and each POST is atomic, so a retry after a lost
+    response, or the same submission enqueued twice, never writes a row
+    twice. Records for an optional table the document does not have are
+    dropped (and counted) instead of being retried forever.
+    """
+
+    def __init__(self, backend, directory, chunk_size=CHUNK_SIZE, on_flushed=None):
+        self.backend = backend
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size
+        self.on_flushed = on_flushed
+
+        self.stats = {"enqueued": 0, "flushed": 0, "records_flushed": 0, "records_dropped": 0,
+                      "failures": 0, "last_error": None}
+        self._retry_at = {}  # submission_id -> (monotonic time, attempts)
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    # -------------------------------------------------------------------------
+    # Producer side
+    # -------------------------------------------------------------------------
+    def enqueue(self, table_id, records, submission_id=None):
+        """Persist a submission to one table durably and return its id (milliseconds, no network)."""
+        return self.enqueue_tables({table_id: records}, submission_id)
+
+    def enqueue_tables(self, tables, submission_id=None, optional=()):
+        """Persist records for several tables as one submission, all or nothing. Returns its id.
+
+        Passing the ``submission_id`` of a submission already enqueued
+        replaces it: its rows are still written only once. Tables listed in
+        ``optional`` may be missing from the document.
+        """
+        submission_id = submission_id or uuid.uuid4().hex
+        payload = {
+            "submission_id": submission_id,
+            "created_at": time.time(),
+            "tables": {
+                table_id: [{**r, IDEMPOTENCY_COLUMN: submission_id} for r in records]
+                for table_id, records in tables.items()
+            },
+            "optional": [table_id for table_id in optional if table_id in tables],
+        }
+        path = self.directory / f"{submission_id}.json"
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+        with self._lock:
+            self.stats["enqueued"] += 1
+        self.start()
+        self._wakeup.set()
+        return submission_id
+
+    def pending(self):
+        """Submissions still waiting on disk."""
+        def mtime(path):
+            try:
+                return path.stat().st_mtime
+            except OSError:
+                return 0.0  # Flushed and removed meanwhile: skipped by _flush
+        return sorted(self.directory.glob("*.json"), key=mtime)
+
+    # -------------------------------------------------------------------------
+    # Worker side
+    # -------------------------------------------------------------------------
+    def start(self):
+        """Start the flush worker once per process."""
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="submission-spool", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        failures = 0
+        while True:
+            self._wakeup.clear()
+            try:
+                next_wakeup = self.flush_pending()
+                failures = 0
+            except Exception as e:  # Keep the worker alive: retry everything later
+                logger.exception("Submission spool flush failed")
+                with self._lock:
+                    self.stats["failures"] += 1
+                    self.stats["last_error"] = str(e)
+                next_wakeup = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** failures)
+                failures += 1
+            self._wakeup.wait(timeout=next_wakeup)
+
+    def flush_pending(self):
+        """Flush every due submission. Returns seconds until the next retry (or None)."""
+        next_retry = None
+        for path in self.pending():
+            submission_id = path.stem
+            retry_at, attempts = self._retry_at.get(submission_id, (0, 0))
+            wait = retry_at - time.monotonic()
+            if wait > 0:
+                next_retry = wait if next_retry is None else min(next_retry, wait)
+                continue
+
+            error = self._flush(path)
+            with self._lock:
+                if error is None:
+                    self._retry_at.pop(submission_id, None)
+                    self.stats["flushed"] += 1
+                else:
+                    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempts)
+                    self._retry_at[submission_id] = (time.monotonic() + delay, attempts + 1)
+                    self.stats["failures"] += 1
+                    self.stats["last_error"] = error
+                    next_retry = delay if next_retry is None else min(next_retry, delay)
+        return next_retry
+
+    def _flush(self, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            return None  # Already flushed
+        except (OSError, ValueError) as e:
+            return f"Spool illisible ({path.name}) : {e}"
+
+        # Files spooled before multi-table submissions hold a single table
+        tables = payload.get("tables") or {payload["table_id"]: payload["records"]}
+        optional = set(payload.get("optional", ()))
+        for table_id, records in tables.items():
+            existing, error = self.backend.list_records(
+                table_id, filter={IDEMPOTENCY_COLUMN: [payload["submission_id"]]}
+            )
+            if error and table_id in optional and error.startswith(TABLE_NOT_FOUND):
+                logger.warning("Optional table %s missing: %d record(s) of %s dropped",
+                               table_id, len(records), payload["submission_id"])
+                with self._lock:
+                    self.stats["records_dropped"] += len(records)
+                    self.stats["last_error"] = error
+                continue
+            if error:
+                return error
+
+            for start in range(len(existing.get("records", [])), len(records), self.chunk_size):
+                chunk = records[start:start + self.chunk_size]
+                _, error = self.backend.add_records(table_id, chunk)
+                if error:
+                    return error
+                with self._lock:
+                    self.stats["records_flushed"] += len(chunk)
+
+        path.unlink(missing_ok=True)
+        if self.on_flushed:
+            for table_id in tables:
+                self.on_flushed(table_id)
+        return None
+
+
+@st.cache_resource
+def get_spool():
+    """Process-wide spool; the directory comes from the ``[spool]`` secrets section."""
+    directory = st.secrets.get("spool", {}).get("path", DEFAULT_SPOOL_DIR)
+    spool = SubmissionSpool(get_backend(), directory, on_flushed=table_cache.invalidate)
+    spool.start()  # Flush what a previous process left behind
+    return spool
@@ -0,0 +1,161 @@
+"""
+Team Formation - La Forge à Data Position
+Dispenser: split participants into balanced teams that cover the data profiles
+"""
+
+import numpy as np
+import pandas as pd
+
+from scoring import PARTICIPANT_COLUMNS
+
+# =============================================================================
+# DEFAULTS
+# =============================================================================
+SWAP_BATCH = 4096     # Candidate swaps evaluated per local-search round
+MAX_ROUNDS = 300
+PATIENCE = 5          # Rounds without improvement before the search stops
+MIN_GAIN = 1e-9
+WEIGHT_COLUMNS = {'mean_score': 'answer_count'}  # Means combined weighted by the answers behind them
+
+
+def teams_table(table_id):
+    """Name of the table holding the team assignments of a responses table."""
+    return f"{table_id}_teams"
+
+
+def skill_matrix(form_data, score_column='score', fill_value=0.0):
+    """Participants × profiles matrix of mean scores (``fill_value`` for profiles not evaluated).
+
+    Summary rows already hold means: several rows of one participant and
+    profile are combined weighted by their answer count, so the matrix is
+    the same as from the raw answers. Returns ``(participants, profiles,
+    skills)``: the participant key columns as a DataFrame, the profile
+    names and a float matrix.
+    """
+    keys = [c for c in PARTICIPANT_COLUMNS if c in form_data.columns]
+    frame = form_data[keys + ['profile_type']].astype(object).fillna('').astype(str)
+    frame['score'] = pd.to_numeric(form_data[score_column], errors='coerce')
+    weight = WEIGHT_COLUMNS.get(score_column)
+    if weight in form_data.columns:
+        frame['weight'] = pd.to_numeric(form_data[weight], errors='coerce').fillna(0).where(frame['score'].notna(), 0)
+    else:
+        frame['weight'] = frame['score'].notna().astype(np.float64)
+    frame = frame[frame['profile_type'] != '']
+
+    frame['score'] = frame['score'] * frame['weight']
+    sums = frame.groupby(keys + ['profile_type'], sort=True)[['score', 'weight']].sum()
+    means = (sums['score'] / sums['weight'].where(sums['weight'] > 0)).dropna()
+    table = means.unstack('profile_type', fill_value=fill_value)
+    return table.index.to_frame(index=False), list(table.columns), table.to_numpy(dtype=np.float64)
+
+
+def _team_value(coverage):
+    # Concave in the team total: lifting a weak team beats improving a strong one
+    return np.sqrt(coverage.sum(axis=-1))
+
+
+def _top_two(skills, team, n_teams):
+    """Best and second-best score per (team, profile), and who holds the best."""
+    n, p = skills.shape
+    best = np.zeros((n_teams, p))
+    best_idx = np.full((n_teams, p), -1)
+    second = np.zeros((n_teams, p))
+    for k in range(p):
+        order = np.lexsort((-skills[:, k], team))
+        sorted_team = team[order]
+        first = np.flatnonzero(np.r_[True, sorted_team[1:] != sorted_team[:-1]])
+        teams = sorted_team[first]
+        best[teams, k] = skills[order[first], k]
+        best_idx[teams, k] = order[first]
+        has_second = (first + 1 < n) & (sorted_team[np.minimum(first + 1, n - 1)] == teams)
+        second[teams[has_second], k] = skills[order[first[has_second] + 1], k]
+    return best, best_idx, second
+
+
+def _greedy(skills, capacity):
+    """Strongest participants first, each to the team whose value it raises most."""
+    n_teams, p = len(capacity), skills.shape[1]
+    coverage = np.zeros((n_teams, p))
+    size = np.zeros(n_teams, dtype=int)
+    team = np.empty(len(skills), dtype=int)
+    for i in np.argsort(-skills.sum(axis=1), kind='stable'):
+        gain = _team_value(np.maximum(coverage, skills[i])) - _team_value(coverage)
+        gain[size >= capacity] = -np.inf
+        t = int(np.argmax(gain))
+        team[i] = t
+        size[t] += 1
+        np.maximum(coverage[t], skills[i], out=coverage[t])
+    return team
+
+
+def form_teams(skills, n_teams, rounds=MAX_ROUNDS, batch=SWAP_BATCH, seed=0):
+    """Assign each participant (row of ``skills``) to one of ``n_teams`` teams.
+
+    A team covers a profile with its best member's score, and the
+    objective sums a concave function of each team's total coverage.
+    Team sizes differ by at most one. A greedy pass builds the teams,
+    then rounds of random member swaps are evaluated in batch with NumPy
+    and the best non-overlapping improving swaps are applied.
+    Returns the team index of every participant.
+    """
+    n = len(skills)
+    if n == 0:
+        return np.zeros(0, dtype=int)
+    n_teams = max(1, min(n_teams, n))
+    capacity = np.full(n_teams, n // n_teams)
+    capacity[:n % n_teams] += 1
+    team = _greedy(skills, capacity)
+    if n_teams == 1:
+        return team
+
+    rng = np.random.default_rng(seed)
+    best, best_idx, second = _top_two(skills, team, n_teams)
+    stale = 0
+    for _ in range(rounds):
+        i = rng.integers(n, size=batch)
+        j = rng.integers(n, size=batch)
+        a, b = team[i], team[j]
+        i, j, a, b = i[a != b], j[a != b], a[a != b], b[a != b]
+
+        # Coverage of each team without the member leaving it, then with the newcomer
+        without_i = np.where(best_idx[a] == i[:, None], second[a], best[a])
+        without_j = np.where(best_idx[b] == j[:, None], second[b], best[b])
+        delta = (_team_value(np.maximum(without_i, skills[j]))
+                 + _team_value(np.maximum(without_j, skills[i]))
+                 - _team_value(best[a]) - _team_value(best[b]))
+
+        improving = np.flatnonzero(delta > MIN_GAIN)
+        if not len(improving):
+            stale += 1
+            if stale >= PATIENCE:
+                break
+            continue
+        stale = 0
+
+        # Swaps between disjoint pairs of teams do not affect each other
+        touched = set()
+        for k in improving[np.argsort(-delta[improving])]:
+            if a[k] in touched or b[k] in touched:
+                continue
+            touched.update((a[k], b[k]))
+            team[i[k]], team[j[k]] = b[k], a[k]
+        best, best_idx, second = _top_two(skills, team, n_teams)
+    return team
+
+
+def team_report(profiles, skills, team, n_teams=None):
+    """One row per team: size, coverage of every profile and total coverage."""
+    n_teams = n_teams or (int(team.max()) + 1 if len(team) else 0)
+    best = _top_two(skills, team, n_teams)[0] if len(team) else np.zeros((n_teams, len(profiles)))
+    report = pd.DataFrame(best, columns=profiles)
+    report.insert(0, 'Équipe', np.arange(1, n_teams + 1))
+    report.insert(1, 'Membres', np.bincount(team, minlength=n_teams))
+    report['Couverture'] = best.sum(axis=1)
+    return report
+
+
+def assignment_rows(participants, team):
+    """Rows to store in the teams table: participant keys and 1-based team number."""
+    rows = participants.copy()
+    rows['team'] = team + 1
+    return rows
@@ -0,0 +1,38 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analytics import participant_summary
+
+
+def responses(dtype=object):
+    frame = pd.DataFrame({
+        'nom': ['Durand', None, 'Martin', 'Durand', 'Martin'],
+        'prenom': ['Ana', 'Léo', None, 'Ana', 'Eva'],
+        'profile_type': ['Data Analyst', 'Data Analyst', 'Data Engineer', 'Data Engineer', 'Data Analyst'],
+        'score': [1, 2, 3, 4, 2],
+    })
+    return frame.astype({'nom': dtype, 'prenom': dtype})
+
+
+@pytest.mark.parametrize('dtype', [object, 'category'])
+def test_participant_summary_skips_rows_without_a_name(dtype):
+    summary = participant_summary(responses(dtype))
+
+    assert summary[['Nom', 'Prénom']].values.tolist() == [['Durand', 'Ana'], ['Martin', 'Eva']]
+    assert summary['Score moyen'].tolist() == [2.5, 2.0]
+    assert summary['Profils'].tolist() == ['Data Analyst, Data Engineer', 'Data Analyst']
+
+
+def test_participant_summary_weights_summary_means():
+    frame = responses().dropna()
+    frame['answer_count'] = [3, 1, 2]
+
+    summary = participant_summary(frame, weight='answer_count')
+
+    np.testing.assert_allclose(summary['Score moyen'], [(1 * 3 + 4 * 1) / 4, 2.0])
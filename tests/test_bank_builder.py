@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bank_builder import build_question_bank, check_profiles, merge_sources, normalize_row, read_question_bank
+
+CORE_DATA = Path(__file__).resolve().parent.parent / "core_data"
+
+
+def row(profile="Data Analyst", section="screening", question="Q1", reponse="Oui", score="4", position="1"):
+    return {"profile_type": profile, "question_type": section, "question": question,
+            "reponse": reponse, "score": score, "position": position}
+
+
+def test_normalize_row_rejects_rows_without_section_or_score():
+    assert normalize_row(row(section=""))[1] == "section manquante"
+    assert normalize_row(row(score=""))[1] == "score manquant"
+    fields, error = normalize_row(row(section=" Screening ", score="2,0"))
+    assert error is None
+    assert (fields["question_type"], fields["score"]) == ("screening", 2)
+
+
+def test_merge_sources_keeps_the_first_score_and_reports_conflicts():
+    first = normalize_row(row(score="4"))[0]
+    other_score = normalize_row(row(score="2", position="3"))[0]
+    stats = {}
+
+    rows = list(merge_sources([("a.csv", [first, other_score]), ("b.csv", [first])], stats))
+
+    assert [r["score"] for r in rows] == [4]
+    assert stats["duplicates"] == 2
+    assert len(stats["conflicts"]) == 1 and "score 2 ignoré, 4 conservé" in stats["conflicts"][0]
+
+
+def test_check_profiles_reports_empty_sections():
+    rows = [normalize_row(row(section=s, question=s))[0] for s in ("screening", "expertise", "mastery")]
+    rows.append(normalize_row(row(profile="Geomaticien"))[0])
+
+    assert check_profiles(rows) == ([], {"Geomaticien": ["expertise", "mastery"]})
+
+
+def test_built_bank_has_sections_and_scores_for_every_profile(tmp_path):
+    report, error = build_question_bank([CORE_DATA], tmp_path)
+    assert error is None
+    assert any("Data hunter.csv" in problem for problem in report["problems"])
+
+    payload, error = read_question_bank(tmp_path)
+    assert error is None
+    rows = [record["fields"] for record in payload["records"]]
+    errors, empty = check_profiles(rows)
+    assert errors == []
+    assert "Data Hunter" not in {r["profile_type"] for r in rows}
+    assert report["incomplete"] == empty
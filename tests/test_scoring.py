@@ -0,0 +1,88 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bank_builder import bank_rows
+from question_bank import SECTION_ORDER, compile_question_bank
+from scoring import MAX_SCORE_PER_QUESTION, PASS_THRESHOLD, backfill_id, rescore_responses
+
+CORE_DATA = Path(__file__).resolve().parent.parent / "core_data"
+
+
+@pytest.fixture(scope="module")
+def bank():
+    return compile_question_bank([{"id": i, "fields": fields}
+                                  for i, fields in enumerate(bank_rows([CORE_DATA]), start=1)])
+
+
+def submissions(bank, n_participants=40, seed=0):
+    """Random answers to 1-2 profiles, some questions skipped and some answers unknown to the bank."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for p in range(n_participants):
+        for profile in rng.choice(bank.profiles, size=rng.integers(1, 3), replace=False):
+            for section in SECTION_ORDER:
+                for q in bank.questions(profile, section):
+                    if rng.random() < 0.1:
+                        continue
+                    reponse = q.answers[rng.integers(len(q.answers))] if rng.random() > 0.05 else "Autre"
+                    rows.append((f"nom_{p}", f"prenom_{p}", f"p{p}@example.org", q.text, reponse, profile))
+    return pd.DataFrame(rows, columns=['nom', 'prenom', 'mail', 'question', 'reponse', 'profile_type'])
+
+
+def calculate_section_score(answers, bank, profile, section):
+    """The questionnaire's per-section loop that ``rescore_responses`` replaced."""
+    questions = bank.questions(profile, section)
+    if not questions:
+        return 1.0
+    total = sum(answers[q.text] for q in questions if q.text in answers)
+    return total / (len(questions) * MAX_SCORE_PER_QUESTION)
+
+
+def reference(form_data, bank, threshold):
+    rows = []
+    for (nom, prenom, mail, profile), group in form_data.groupby(['nom', 'prenom', 'mail', 'profile_type']):
+        # One answer per question text, scored by the section it was given in
+        # (a question can be listed in several sections with other answers)
+        answers = {}
+        for question, reponse in zip(group['question'], group['reponse']):
+            scores = [q.scores[q.answers.index(reponse)] or 0 for s in SECTION_ORDER
+                      for q in bank.questions(profile, s) if q.text == question and reponse in q.answers]
+            answers[question] = scores[0] if scores else 0
+        sections = {s: calculate_section_score(answers, bank, profile, s) for s in SECTION_ORDER}
+        rows.append({'nom': nom, 'prenom': prenom, 'mail': mail, 'profile_type': profile, **sections,
+                     'passed': all(v >= threshold for v in sections.values())})
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize("threshold", [PASS_THRESHOLD, 0.4])
+def test_rescore_matches_the_per_section_loop(bank, threshold):
+    form_data = submissions(bank)
+
+    result = rescore_responses(form_data, bank, threshold)
+
+    keys = ['nom', 'prenom', 'mail', 'profile_type']
+    expected = reference(form_data, bank, threshold)
+    pd.testing.assert_frame_equal(result.sort_values(keys, ignore_index=True),
+                                  expected.sort_values(keys, ignore_index=True)[list(result.columns)],
+                                  check_dtype=False)
+    assert 0 < result['passed'].sum() < len(result)
+
+
+def test_rescore_without_responses_is_empty(bank):
+    result = rescore_responses(pd.DataFrame(columns=['nom', 'prenom', 'mail', 'question', 'reponse', 'profile_type']),
+                               bank)
+    assert result.empty
+
+
+def test_backfill_id_depends_on_the_respondents_only():
+    rows = pd.DataFrame({'nom': ['Durand', 'Martin'], 'prenom': ['Ana', 'Eva'], 'mail': ['a@x', 'e@x'],
+                         'profile_type': ['Data Analyst', 'Data Engineer'], 'mean_score': [2.0, 3.0]})
+
+    assert backfill_id(rows) == backfill_id(rows.iloc[::-1].assign(mean_score=[1.0, 1.0]))
+    assert backfill_id(rows) != backfill_id(rows.iloc[:1])
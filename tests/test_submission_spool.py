@@ -0,0 +1,92 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlite_backend import SQLiteBackend
+from submission_spool import SubmissionSpool
+
+
+class FlakyBackend(SQLiteBackend):
+    """Fails chosen POSTs, before or after writing, like a dropped connection."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.posts = 0
+        self.fail_posts = {}  # POST number -> True when the rows are written anyway
+
+    def add_records(self, table_id, records):
+        self.posts += 1
+        written = self.fail_posts.pop(self.posts, None)
+        if written is None:
+            return super().add_records(table_id, records)
+        if written:
+            super().add_records(table_id, records)
+        return None, "Connexion interrompue"
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return FlakyBackend(tmp_path / "forge.db")
+
+
+@pytest.fixture
+def spool(backend, tmp_path):
+    spool = SubmissionSpool(backend, tmp_path / "spool", chunk_size=2)
+    spool.start = lambda: None  # Flushed by the tests, not by the worker thread
+    return spool
+
+
+def answers(n):
+    return [{"nom": "Durand", "question": f"Q{i}", "score": i % 5} for i in range(n)]
+
+
+def stored(backend, table_id="Form3"):
+    data, error = backend.list_records(table_id)
+    assert error is None
+    return [(r["fields"]["submission_id"], r["fields"]["question"]) for r in data["records"]]
+
+
+def stored_summary(backend):
+    data, _ = backend.list_records("Form3_summary")
+    return len(data["records"])
+
+
+def test_same_submission_enqueued_twice_is_written_once(backend, spool):
+    spool.enqueue("Form3", answers(5), "sub-1")
+    spool.enqueue("Form3", answers(5), "sub-1")  # Double click: replaces the pending file
+    spool.flush_pending()
+    spool.enqueue("Form3", answers(5), "sub-1")  # Saved again after the flush
+    spool.flush_pending()
+
+    assert stored(backend) == [("sub-1", f"Q{i}") for i in range(5)]
+    assert spool.pending() == []
+
+
+@pytest.mark.parametrize("written", [False, True], ids=["request lost", "response lost"])
+def test_interrupted_flush_resumes_without_duplicates(backend, spool, written):
+    backend.fail_posts[2] = written  # Second chunk of 2 rows
+    spool.enqueue_tables({"Form3": answers(5), "Form3_summary": [{"nom": "Durand"}]}, "sub-2")
+
+    spool.flush_pending()
+    assert len(spool.pending()) == 1
+    assert spool.stats["failures"] == 1
+    assert len(stored(backend)) == (4 if written else 2)
+
+    spool._retry_at.clear()  # Skip the backoff
+    spool.flush_pending()
+
+    assert stored(backend) == [("sub-2", f"Q{i}") for i in range(5)]
+    assert stored_summary(backend) == 1
+    assert spool.pending() == []
+
+
+def test_missing_optional_table_is_dropped(backend, spool):
+    spool.enqueue_tables({"Form3": answers(1), "Form9": answers(1)}, "sub-3", optional=["Form9"])
+    spool.flush_pending()
+
+    assert stored(backend) == [("sub-3", "Q0")]
+    assert spool.stats["records_dropped"] == 1
+    assert spool.pending() == []
@@ -0,0 +1,78 @@
+import sys
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from teams import _greedy, _top_two, form_teams, team_report
+
+
+def make_skills(n, n_profiles=4, seed=0):
+    rng = np.random.default_rng(seed)
+    skills = rng.uniform(0, 4, size=(n, n_profiles))
+    skills[rng.random(skills.shape) < 0.5] = 0.0  # Profiles not evaluated
+    return skills
+
+
+def objective(skills, team, n_teams):
+    """Sum over teams of sqrt(total coverage), a team covering a profile with its best member."""
+    return sum(np.sqrt(skills[team == t].max(axis=0, initial=0.0).sum()) for t in range(n_teams))
+
+
+@pytest.mark.parametrize("n, n_teams", [(12, 3), (13, 4), (9, 2)])
+def test_no_single_swap_improves_the_teams(n, n_teams):
+    skills = make_skills(n, seed=n)
+
+    team = form_teams(skills, n_teams)
+
+    sizes = np.bincount(team, minlength=n_teams)
+    assert sizes.max() - sizes.min() <= 1
+    value = objective(skills, team, n_teams)
+    for i, j in combinations(range(n), 2):
+        if team[i] != team[j]:
+            swapped = team.copy()
+            swapped[[i, j]] = team[[j, i]]
+            assert objective(skills, swapped, n_teams) <= value + 1e-9
+
+
+def test_local_search_never_worsens_the_greedy_teams():
+    skills = make_skills(200, n_profiles=7)
+    n_teams = 40
+    capacity = np.full(n_teams, 5)
+
+    greedy = _greedy(skills, capacity)
+    team = form_teams(skills, n_teams)
+
+    assert objective(skills, team, n_teams) >= objective(skills, greedy, n_teams)
+
+
+def test_top_two_matches_sorted_team_scores():
+    skills = make_skills(30, seed=1)
+    team = np.arange(30) % 4
+    team[team == 3] = 2  # Team 3 is empty
+
+    best, best_idx, second = _top_two(skills, team, 4)
+
+    for t in range(4):
+        members = np.flatnonzero(team == t)
+        for k in range(skills.shape[1]):
+            scores = np.sort(skills[members, k])[::-1]
+            assert best[t, k] == (scores[0] if len(scores) else 0.0)
+            assert second[t, k] == (scores[1] if len(scores) > 1 else 0.0)
+            if len(members):
+                assert skills[best_idx[t, k], k] == best[t, k] and team[best_idx[t, k]] == t
+
+
+def test_team_report_and_edge_cases():
+    skills = make_skills(10)
+    team = form_teams(skills, 3)
+    report = team_report(list("ABCD"), skills, team)
+
+    assert report['Membres'].sum() == 10
+    np.testing.assert_allclose(report['Couverture'],
+                               [skills[team == t].max(axis=0).sum() for t in range(3)])
+    assert len(form_teams(np.zeros((0, 4)), 3)) == 0
+    assert set(form_teams(skills[:2], 5)) == {0, 1}  # No more teams than participants
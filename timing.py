@@ -0,0 +1,205 @@
+"""
+Timing Spans - La Forge à Data Position
+Per-stage rerun timings aggregated into per-page histograms, exported for Prometheus
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+
+import streamlit as st
+
+# =============================================================================
+# DEFAULTS
+# =============================================================================
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Seconds
+DEFAULT_METRICS_PATH = "metrics/forge.prom"
+DEFAULT_EXPORT_INTERVAL = 15   # Seconds between two rewrites of the Prometheus file
+METRIC_NAME = "forge_stage_duration_seconds"
+RERUN_BUCKETS = (5, 10, 15, 20, 30, 50, 75, 100, 150, 200, 300, 500)  # Script runs per questionnaire
+RERUNS_METRIC_NAME = "forge_questionnaire_reruns"
+
+
+class Histogram:
+    """Cumulative-bucket histogram (durations or counts), as Prometheus stores them."""
+
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot: above the largest bound
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Estimated quantile, interpolated within its bucket like ``histogram_quantile``."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / n)
+            seen += n
+        return self.max
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class SpanRegistry:
+    """Process-wide histograms keyed by ``(page, stage)``.
+
+    Pages wrap their stages in ``span``; every session of the process adds
+    to the same histograms, so the Admin page and the exported file show
+    the distribution across all users since the process started. The
+    number of script runs each completed questionnaire took is kept in a
+    histogram of its own.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.started_at = time.time()
+        self.reruns = Histogram(RERUN_BUCKETS)
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, page, stage, seconds):
+        with self._lock:
+            histogram = self._histograms.get((page, stage))
+            if histogram is None:
+                histogram = self._histograms[(page, stage)] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def observe_reruns(self, count):
+        """Record the script runs a completed questionnaire took."""
+        with self._lock:
+            self.reruns.observe(count)
+
+    @contextmanager
+    def span(self, page, stage):
+        """Time the block, including when it ends with ``st.rerun`` or ``st.stop``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(page, stage, time.perf_counter() - start)
+
+    def summary(self):
+        """One row per (page, stage): calls, mean, estimated p50/p95/p99 and max in ms."""
+        with self._lock:
+            items = sorted(self._histograms.items())
+            return [{
+                "Page": page,
+                "Étape": stage,
+                "Appels": h.count,
+                "Total (s)": round(h.sum, 2),
+                "Moyenne (ms)": round(1000 * h.sum / h.count, 1),
+                "p50 (ms)": round(1000 * h.quantile(0.50), 1),
+                "p95 (ms)": round(1000 * h.quantile(0.95), 1),
+                "p99 (ms)": round(1000 * h.quantile(0.99), 1),
+                "Max (ms)": round(1000 * h.max, 1),
+            } for (page, stage), h in items]
+
+    def reruns_summary(self):
+        """Completed questionnaires and their script runs: mean, estimated p50/p95, max."""
+        with self._lock:
+            h = self.reruns
+            return {
+                "completed": h.count,
+                "mean": h.sum / h.count if h.count else 0.0,
+                "p50": h.quantile(0.50),
+                "p95": h.quantile(0.95),
+                "max": h.max,
+            }
+
+    def prometheus(self):
+        """All histograms in the Prometheus text exposition format."""
+        lines = [f"# HELP {METRIC_NAME} Time spent in a page stage during Streamlit reruns.",
+                 f"# TYPE {METRIC_NAME} histogram"]
+        with self._lock:
+            for (page, stage), h in sorted(self._histograms.items()):
+                labels = f'page="{_label(page)}",stage="{_label(stage)}"'
+                cumulative = 0
+                for bound, n in zip(self.buckets, h.counts):
+                    cumulative += n
+                    lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{METRIC_NAME}_bucket{{{labels},le="+Inf"}} {h.count}')
+                lines.append(f"{METRIC_NAME}_sum{{{labels}}} {h.sum:.6f}")
+                lines.append(f"{METRIC_NAME}_count{{{labels}}} {h.count}")
+
+            lines += [f"# HELP {RERUNS_METRIC_NAME} Script runs taken by a completed questionnaire.",
+                      f"# TYPE {RERUNS_METRIC_NAME} histogram"]
+            cumulative = 0
+            for bound, n in zip(self.reruns.buckets, self.reruns.counts):
+                cumulative += n
+                lines.append(f'{RERUNS_METRIC_NAME}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f'{RERUNS_METRIC_NAME}_bucket{{le="+Inf"}} {self.reruns.count}')
+            lines.append(f"{RERUNS_METRIC_NAME}_sum {self.reruns.sum:g}")
+            lines.append(f"{RERUNS_METRIC_NAME}_count {self.reruns.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Write the Prometheus file atomically, for node_exporter's textfile collector."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(self.prometheus(), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self.reruns = Histogram(RERUN_BUCKETS)
+            self.started_at = time.time()
+
+
+spans = SpanRegistry()
+
+
+class MetricsExporter:
+    """Background thread rewriting the Prometheus file every ``interval`` seconds."""
+
+    def __init__(self, registry, path, interval=DEFAULT_EXPORT_INTERVAL):
+        self.registry = registry
+        self.path = Path(path)
+        self.interval = interval
+        self.last_export = None
+        self.last_error = None
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.export()
+
+    def export(self):
+        try:
+            self.registry.export(self.path)
+            self.last_export, self.last_error = time.time(), None
+        except OSError as e:
+            self.last_error = str(e)
+
+
+@st.cache_resource
+def get_metrics_exporter():
+    """Process-wide exporter configured by the ``[metrics]`` secrets section (None if disabled)."""
+    metrics = st.secrets.get("metrics", {})
+    if not metrics.get("enabled", True):
+        return None
+    return MetricsExporter(spans, metrics.get("path", DEFAULT_METRICS_PATH),
+                           metrics.get("interval", DEFAULT_EXPORT_INTERVAL))